@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import has_app_context
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+# Alpha Nex AI Result Cache
+# Two tiers: a per-process LRU in front of a shared table in the app database.
+
+CACHE_ENABLED = os.environ.get("AI_CACHE_ENABLED", "1") == "1"
+LRU_SIZE = int(os.environ.get("AI_CACHE_LRU_SIZE", "1024"))
+TTL_SECONDS = int(os.environ.get("AI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_ROWS = int(os.environ.get("AI_CACHE_MAX_ROWS", "50000"))
+EVICT_EVERY = 100  # Run size-based eviction once per this many shared writes
+
+_lock = threading.Lock()
+_lru = OrderedDict()  # key -> (expires_monotonic, value)
+_stats = {"lru_hits": 0, "shared_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+_writes_since_evict = 0
+
+def _normalize(value):
+    """Collapse whitespace so trivially different prompts share a cache entry."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+def make_cache_key(function, model, *inputs):
+    """Hash (function, model, normalized inputs) into a cache key."""
+    raw = json.dumps([function, model] + [_normalize(value) for value in inputs], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _table():
+    from models import AIResultCache
+    return AIResultCache.__table__
+
+def _count(stat):
+    with _lock:
+        _stats[stat] += 1
+
+def _lru_get(key):
+    with _lock:
+        entry = _lru.get(key)
+        if not entry:
+            return None
+        if entry[0] < time.monotonic():
+            del _lru[key]
+            return None
+        _lru.move_to_end(key)
+        return entry[1]
+
+def _lru_set(key, value, ttl):
+    with _lock:
+        _lru[key] = (time.monotonic() + ttl, value)
+        _lru.move_to_end(key)
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+def cache_get(key):
+    """Return a cached value or None. Checks the in-process LRU, then the shared table."""
+    if not CACHE_ENABLED:
+        return None
+
+    value = _lru_get(key)
+    if value is not None:
+        _count("lru_hits")
+        return value
+
+    if has_app_context():
+        from app import db
+        table = _table()
+        try:
+            # Separate connection so cache reads never touch the caller's session
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    select(table.c.value, table.c.expires_at).where(table.c.key == key)
+                ).first()
+            if row and row.expires_at > datetime.utcnow():
+                remaining = (row.expires_at - datetime.utcnow()).total_seconds()
+                _lru_set(key, row.value, remaining)
+                _count("shared_hits")
+                return row.value
+        except Exception as e:
+            print(f"AI cache read failed: {e}")
+            _count("errors")
+
+    _count("misses")
+    return None
+
+def cache_set(key, function, value, ttl=None):
+    """Store a value in both tiers."""
+    global _writes_since_evict
+    if not CACHE_ENABLED:
+        return
+
+    ttl = ttl or TTL_SECONDS
+    _lru_set(key, value, ttl)
+    _count("writes")
+
+    if not has_app_context():
+        return
+
+    from app import db
+    table = _table()
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+    try:
+        with db.engine.begin() as conn:
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(table).values(key=key, function=function, value=value,
+                                                      created_at=now, expires_at=expires_at))
+            except IntegrityError:
+                conn.execute(update(table).where(table.c.key == key)
+                             .values(value=value, created_at=now, expires_at=expires_at))
+
+        with _lock:
+            _writes_since_evict += 1
+            should_evict = _writes_since_evict >= EVICT_EVERY
+            if should_evict:
+                _writes_since_evict = 0
+        if should_evict:
+            evict_expired()
+    except Exception as e:
+        print(f"AI cache write failed: {e}")
+        _count("errors")
+
+def evict_expired(max_rows=None):
+    """Drop expired rows, then the oldest rows beyond max_rows. Needs an app context."""
+    from app import db
+    table = _table()
+    max_rows = max_rows or MAX_ROWS
+
+    with db.engine.begin() as conn:
+        conn.execute(delete(table).where(table.c.expires_at <= datetime.utcnow()))
+        cutoff = conn.execute(
+            select(table.c.created_at).order_by(table.c.created_at.desc()).offset(max_rows).limit(1)
+        ).scalar()
+        if cutoff is not None:
+            conn.execute(delete(table).where(table.c.created_at <= cutoff))
+
+def get_cache_stats():
+    """Hit/miss counters for this process."""
+    with _lock:
+        stats = dict(_stats)
+        stats["lru_entries"] = len(_lru)
+    lookups = stats["lru_hits"] + stats["shared_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["lru_hits"] + stats["shared_hits"]) / lookups if lookups else 0.0
+    return stats
+
+def clear_local_cache():
+    """Empty the in-process tier (the shared table is left alone)."""
+    with _lock:
+        _lru.clear()
@@ -2,6 +2,9 @@ import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
+from ingest import IngestRequest
+from db_config import normalize_database_url, get_engine_options, register_engine_events
+from metrics import init_metrics
 
 class Base(DeclarativeBase):
     pass
@@ -9,13 +12,67 @@ class Base(DeclarativeBase):
 db = SQLAlchemy(model_class=Base)
 
 app = Flask(__name__)
+app.request_class = IngestRequest
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///content.db")
+app.config["SQLALCHEMY_DATABASE_URI"] = normalize_database_url(os.environ.get("DATABASE_URL", "sqlite:///content.db"))
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["UPLOAD_FOLDER"] = os.environ.get("UPLOAD_FOLDER", "uploads")
+app.config["STORAGE_BACKEND"] = os.environ.get("STORAGE_BACKEND", "local")  # see storage.py
+app.config["MAX_UPLOAD_BYTES"] = int(os.environ.get("MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+# Reject oversized request bodies before parsing (file cap plus room for form fields)
+app.config["MAX_CONTENT_LENGTH"] = app.config["MAX_UPLOAD_BYTES"] + 1024 * 1024
+app.config["CONTENT_PAGE_SIZE"] = int(os.environ.get("CONTENT_PAGE_SIZE", "20"))
+app.config["CONTENT_PAGE_SIZE_MAX"] = int(os.environ.get("CONTENT_PAGE_SIZE_MAX", "100"))
+app.config["REVIEW_QUEUE_PAGE_SIZE"] = int(os.environ.get("REVIEW_QUEUE_PAGE_SIZE", "20"))
+app.config["STATS_CACHE_MAX_AGE"] = int(os.environ.get("STATS_CACHE_MAX_AGE", "300"))
+# Stored file delivery (see file_serving.py): "", "x-sendfile" or "x-accel-redirect"
+app.config["FILE_OFFLOAD"] = os.environ.get("FILE_OFFLOAD", "")
+app.config["USE_X_SENDFILE"] = app.config["FILE_OFFLOAD"] == "x-sendfile"
+app.config["X_ACCEL_PREFIX"] = os.environ.get("X_ACCEL_PREFIX", "/protected-uploads/")
+app.config["FILE_MAX_AGE"] = int(os.environ.get("FILE_MAX_AGE", "3600"))
+# Server-Sent Events: streams end before the worker timeout and the browser reconnects.
+# Each open stream holds a sync worker, so they are only offered in the async serving modes
+# (see gunicorn.conf.py); otherwise pages poll /api/upload_statuses instead.
+app.config["SSE_ENABLED"] = os.environ.get("SERVING_MODE", "sync") in ("gevent", "gthread")
+app.config["SSE_POLL_INTERVAL"] = float(os.environ.get("SSE_POLL_INTERVAL", "3"))
+app.config["SSE_MAX_DURATION"] = int(os.environ.get("SSE_MAX_DURATION", "25"))
+# Bearer token Prometheus sends to scrape /metrics; unset keeps the endpoint off
+app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN", "")
+
+# Background job queue (see job_queue.py / worker.py)
+app.config["JOB_POLL_INTERVAL"] = float(os.environ.get("JOB_POLL_INTERVAL", "2"))
+app.config["JOB_MAX_ATTEMPTS"] = int(os.environ.get("JOB_MAX_ATTEMPTS", "5"))
+app.config["JOB_RETRY_BASE_SECONDS"] = int(os.environ.get("JOB_RETRY_BASE_SECONDS", "10"))
+app.config["JOB_RETRY_MAX_SECONDS"] = int(os.environ.get("JOB_RETRY_MAX_SECONDS", "3600"))
+app.config["JOB_LOCK_TIMEOUT"] = int(os.environ.get("JOB_LOCK_TIMEOUT", "300"))
+app.config["JOB_RETENTION_DAYS"] = int(os.environ.get("JOB_RETENTION_DAYS", "7"))
+
+# Demo data retention (see retention.py): batches are small and paced so deletes never hold long locks
+app.config["DEMO_RETENTION_DAYS"] = int(os.environ.get("DEMO_RETENTION_DAYS", "7"))
+app.config["RETENTION_BATCH_SIZE"] = int(os.environ.get("RETENTION_BATCH_SIZE", "50"))
+app.config["RETENTION_BATCH_PAUSE"] = float(os.environ.get("RETENTION_BATCH_PAUSE", "0.5"))
+app.config["RETENTION_MAX_BATCHES"] = int(os.environ.get("RETENTION_MAX_BATCHES", "20"))
+app.config["RETENTION_INTERVAL"] = int(os.environ.get("RETENTION_INTERVAL", "3600"))
 
 db.init_app(app)
 
-with app.app_context():
-    import models
-    import routes
-    db.create_all()
\ No newline at end of file
+def create_app():
+    """
+    Finish wiring the app: engine events, metrics, models, routes and CLI commands.
+    Schema management is not done here - run `flask --app main db-upgrade`
+    as a release/build step so worker boots and --reload restarts skip it.
+    """
+    if not app.extensions.get("alphanex_ready"):
+        with app.app_context():
+            register_engine_events(db.engine)
+            init_metrics(app, db.engine)
+        import models  # noqa: F401
+        import routes  # noqa: F401
+        import routes_old  # noqa: F401 - demo upload/review/dashboard flow
+        import migrations  # noqa: F401 - registers the db-upgrade CLI command
+        import storage  # noqa: F401 - registers the storage-migrate CLI command
+        import retention  # noqa: F401 - registers the demo-purge CLI command
+        import tasks  # noqa: F401 - registers the ai-rescore CLI command
+        app.extensions["alphanex_ready"] = True
+    return app
\ No newline at end of file
@@ -0,0 +1,270 @@
+# Alpha Nex - Load Test Harness
+# Drives the upload -> AI analysis -> review -> finalisation flow with concurrent
+# virtual users against a local OpenAI stand-in (mock_openai.py), so runs are
+# reproducible and cost nothing. Each virtual user is a fresh cookie session, so
+# the app seeds its own demo user and fixture uploads for it. Reports throughput,
+# p50/p95/p99 latency and SQL queries per request for every endpoint, and can
+# save a run as a baseline to compare later runs against.
+# The app it starts gets a throwaway SQLite database and upload folder, upgraded
+# with db-upgrade before gunicorn starts; nothing touches DATABASE_URL.
+# A preflight check stops the run if the target does not serve the demo flow,
+# rather than timing 404s.
+# Needs the optional bench dependencies: pip install ".[bench]"
+#   python bench_load.py --users 50 --concurrency 10 --save-baseline main
+#   python bench_load.py --users 50 --concurrency 10 --compare main
+#   METRICS_TOKEN=... python bench_load.py --url http://127.0.0.1:5000 --users 20   # already running app
+import argparse
+import json
+import os
+import random
+import re
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from mock_openai import start_mock_server
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baselines")
+CSRF_TOKEN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+REVIEW_LINK = re.compile(r'/review/(\d+)')
+# /metrics needs the app's METRICS_TOKEN; an app started here gets this one
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or secrets.token_urlsafe(16)
+METRICS_HEADERS = {"Authorization": f"Bearer {METRICS_TOKEN}"}
+SQL_SAMPLE = re.compile(r'^alphanex_request_sql_queries_(sum|count)\{endpoint="([^"]+)"\} ([0-9.e+-]+)$', re.MULTILINE)
+
+# Flask endpoint name for each step, so /metrics samples line up with client timings
+STEPS = {
+    "dashboard": "GET /dashboard",
+    "upload_file": "GET+POST /upload",
+    "review_content": "GET /review",
+    "review_upload": "GET+POST /review/<id>",
+    "dashboard_stats": "GET /api/dashboard_stats",
+    "upload_statuses": "GET /api/upload_statuses?ids=",
+}
+
+class Recorder:
+    """Thread-safe latency and error tally per step."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def timed(self, step, send):
+        start = time.perf_counter()
+        try:
+            response = send()
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.latencies[step].append(elapsed)
+            if not ok:
+                self.errors[step] += 1
+        return response if ok else None
+
+def _csrf(response):
+    match = CSRF_TOKEN.search(response.text) if response is not None else None
+    return {"csrf_token": match.group(1)} if match else {}
+
+def virtual_user(base_url, recorder, file_kb):
+    """One demo session: dashboard, upload, browse the queue, review one item, poll its own upload's status."""
+    with httpx.Client(base_url=base_url, timeout=60, follow_redirects=False) as client:
+        recorder.timed("dashboard", lambda: client.get("/dashboard"))
+
+        form = recorder.timed("upload_file", lambda: client.get("/upload"))
+        # Unique bytes per user - identical files are rejected as duplicates
+        body = f"load test {uuid.uuid4()}\n".encode() + os.urandom(file_kb * 1024).hex().encode()
+        recorder.timed("upload_file", lambda: client.post("/upload", data={
+            **_csrf(form),
+            # Distinct text per user, so each upload is a fresh AI analysis rather than a cache hit
+            "description": f"Load test upload {uuid.uuid4().hex[:12]} with enough words to pass validation.",
+            "category": "text",
+            "ai_consent": "y",
+        }, files={"file": (f"bench_{uuid.uuid4().hex[:8]}.txt", body, "text/plain")}))
+
+        queue = recorder.timed("review_content", lambda: client.get("/review"))
+        upload_ids = REVIEW_LINK.findall(queue.text) if queue is not None else []
+        if upload_ids:
+            review_one(client, recorder, random.choice(upload_ids))
+
+        # The status poll the dashboard makes for the user's own uploads
+        stats = recorder.timed("dashboard_stats", lambda: client.get("/api/dashboard_stats"))
+        own_ids = [str(upload["id"]) for upload in stats.json()["recent_uploads"]] if stats is not None else []
+        if own_ids:
+            recorder.timed("upload_statuses", lambda: client.get(f"/api/upload_statuses?ids={','.join(own_ids)}"))
+
+def review_one(client, recorder, upload_id):
+    """Open a queued upload and submit a review; bad ratings carry the required reason."""
+    page = recorder.timed("review_upload", lambda: client.get(f"/review/{upload_id}"))
+    rating = random.choice(["good", "good", "bad"])
+    recorder.timed("review_upload", lambda: client.post(f"/review/{upload_id}", data={
+        **_csrf(page),
+        "rating": rating,
+        "description": "Load test review with a detailed enough reason." if rating == "bad" else "",
+    }))
+
+def sql_totals(base_url):
+    """(sum, count) of the per-request SQL query histogram by endpoint, from /metrics."""
+    totals = defaultdict(lambda: [0.0, 0.0])
+    try:
+        text = httpx.get(f"{base_url}/metrics", headers=METRICS_HEADERS, timeout=10).text
+    except httpx.HTTPError:
+        return totals
+    for kind, endpoint, value in SQL_SAMPLE.findall(text):
+        totals[endpoint][0 if kind == "sum" else 1] += float(value)
+    return totals
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def summarize(recorder, elapsed, sql_before, sql_after):
+    """Per-step figures; latencies in milliseconds."""
+    report = {}
+    for step in STEPS:
+        latencies = recorder.latencies.get(step)
+        if not latencies:
+            continue
+        queries_sum = sql_after[step][0] - sql_before[step][0]
+        queries_count = sql_after[step][1] - sql_before[step][1]
+        report[step] = {
+            "requests": len(latencies),
+            "errors": recorder.errors.get(step, 0),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(statistics.median(latencies) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "queries_per_request": round(queries_sum / queries_count, 1) if queries_count else None,
+        }
+    return report
+
+def print_report(report, elapsed, baseline=None):
+    print(f"\n{'step':<16}{'reqs':>6}{'err':>5}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'sql/req':>9}")
+    for step, row in report.items():
+        queries = "-" if row["queries_per_request"] is None else f"{row['queries_per_request']:.1f}"
+        print(f"{step:<16}{row['requests']:>6}{row['errors']:>5}{row['throughput_rps']:>8.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{queries:>9}")
+        previous = (baseline or {}).get("steps", {}).get(step)
+        if previous:
+            deltas = []
+            for key in ("p50_ms", "p95_ms", "p99_ms", "queries_per_request"):
+                if previous.get(key) and row.get(key) is not None:
+                    deltas.append(f"{key} {(row[key] - previous[key]) / previous[key] * 100:+.0f}%")
+            print(f"{'':<16}vs baseline: {', '.join(deltas)}")
+    print(f"\nTotal {sum(row['requests'] for row in report.values())} requests in {elapsed:.1f}s")
+
+def start_app(port, openai_url, workers, workdir):
+    """
+    Run the app under gunicorn plus a job worker, both pointed at the mock OpenAI
+    server, with a fresh SQLite database and upload folder under workdir.
+    """
+    env = dict(os.environ, OPENAI_BASE_URL=openai_url, OPENAI_API_KEY="mock-key",
+               PORT=str(port), WEB_CONCURRENCY=str(workers),
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               UPLOAD_FOLDER=os.path.join(workdir, "uploads"),
+               PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, "metrics"), METRICS_TOKEN=METRICS_TOKEN)
+    os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"])
+    here = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, "-m", "flask", "--app", "main", "db-upgrade"],
+                   cwd=here, env=env, stdout=subprocess.DEVNULL, check=True)
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py",
+                          "--access-logfile", "/dev/null", "main:app"],
+                         cwd=here, env=env, stdout=subprocess.DEVNULL),
+        subprocess.Popen([sys.executable, "worker.py"], cwd=here, env=env, stdout=subprocess.DEVNULL),
+    ]
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"{base_url}/metrics", headers=METRICS_HEADERS, timeout=1)
+            return base_url, processes
+        except httpx.HTTPError:
+            time.sleep(0.25)
+    stop_app(processes)
+    raise RuntimeError("App did not start within 30 seconds")
+
+def check_routes(base_url):
+    """Stop early when the app does not serve the demo flow, rather than timing 404s."""
+    missing = [path for path in ("/dashboard", "/upload", "/review")
+               if httpx.get(f"{base_url}{path}", timeout=10).status_code == 404]
+    if missing:
+        raise SystemExit(f"{base_url} does not serve {', '.join(missing)} - is it Alpha Nex, with the demo flow registered?")
+
+def stop_app(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Alpha Nex load test")
+    parser.add_argument("--url", help="target an already running app instead of starting one")
+    parser.add_argument("--users", type=int, default=50, help="virtual users (demo sessions) to run")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--file-kb", type=int, default=16, help="random payload per upload")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers when starting the app")
+    parser.add_argument("--openai-latency", type=float, default=0.5)
+    parser.add_argument("--openai-jitter", type=float, default=0.1)
+    parser.add_argument("--openai-failure-rate", type=float, default=0.0)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    args = parser.parse_args()
+
+    mock = start_mock_server(0, args.openai_latency, args.openai_jitter, args.openai_failure_rate)
+    openai_url = f"http://127.0.0.1:{mock.server_address[1]}/v1"
+    processes = []
+    workdir = tempfile.TemporaryDirectory(prefix="alphanex-bench-")
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+            print(f"Targeting {base_url}; the app's OpenAI calls go wherever it is configured")
+        else:
+            base_url, processes = start_app(args.port, openai_url, args.workers, workdir.name)
+            print(f"Started app at {base_url} with OpenAI stand-in at {openai_url}")
+        check_routes(base_url)
+
+        recorder = Recorder()
+        sql_before = sql_totals(base_url)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for future in [pool.submit(virtual_user, base_url, recorder, args.file_kb) for _ in range(args.users)]:
+                future.result()
+        elapsed = time.perf_counter() - start
+        sql_after = sql_totals(base_url)
+    finally:
+        stop_app(processes)
+        mock.shutdown()
+        workdir.cleanup()
+
+    report = summarize(recorder, elapsed, sql_before, sql_after)
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+    print_report(report, elapsed, baseline)
+    print(f"OpenAI stand-in: {mock.RequestHandlerClass.stats['calls']} calls, "
+          f"{mock.RequestHandlerClass.stats['failures']} failures")
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as f:
+            json.dump({"users": args.users, "concurrency": args.concurrency, "elapsed": elapsed,
+                       "steps": report}, f, indent=2)
+        print(f"Saved baseline to {path}")
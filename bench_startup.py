@@ -0,0 +1,46 @@
+# Alpha Nex - Cold Start Benchmark
+# Times `import main` (what gunicorn does when loading main:app) in fresh
+# interpreters, which is what an autoscale instance pays on every scale-up.
+#   python bench_startup.py [runs]
+#   python bench_startup.py --importtime   # slowest imports of one cold start
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+def time_cold_start(runs):
+    """Run the import probe in a new interpreter each time. Returns seconds per run."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", PROBE], cwd=here,
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+def slowest_imports(limit=15):
+    """Cumulative -X importtime figures for the heaviest top-level imports, in microseconds."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=here,
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        rows.append((int(cumulative_us), name.rstrip()))
+    return sorted(rows, reverse=True)[:limit]
+
+if __name__ == '__main__':
+    if "--importtime" in sys.argv:
+        for cumulative_us, name in slowest_imports():
+            print(f"{cumulative_us / 1000:8.1f} ms  {name}")
+        sys.exit(0)
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    timings = time_cold_start(runs)
+    print(f"main:app cold start over {runs} runs: "
+          f"median {statistics.median(timings) * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms")
@@ -0,0 +1,65 @@
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import FileBlob
+
+# Alpha Nex Content-addressed Blob Registry
+# Tracks which stored file holds each content hash. New uploads claim their
+# hash before the file is moved into place, so identical bytes are rejected up
+# front; files shared by legacy uploads (see storage-migrate) are only deleted
+# with their last reference.
+
+def find_blob_by_path(file_path):
+    """Blob record for a stored file (its content hash), or None for files that predate the registry."""
+    return FileBlob.query.filter_by(file_path=file_path).first()
+
+def claim_blob(digest, file_path, size):
+    """
+    Register new content before its file is moved into place. Caller commits.
+    Returns False, writing nothing, if a live blob already holds this digest (an
+    exact duplicate). The row is locked, or inserted and flushed, first, so a
+    concurrent upload of the same bytes waits here until this transaction ends.
+    """
+    blob = FileBlob.query.filter_by(digest=digest).with_for_update().first()
+    if blob is None:
+        blob = FileBlob()
+        blob.digest = digest
+        blob.file_path = file_path
+        blob.size = size
+        blob.ref_count = 1
+        try:
+            with db.session.begin_nested():
+                db.session.add(blob)
+        except IntegrityError:
+            # A concurrent upload of the same bytes registered them first
+            return False
+        return True
+
+    if blob.ref_count > 0:
+        return False
+    # Orphaned row whose file was already removed - adopt the new copy
+    blob.file_path = file_path
+    blob.size = size
+    blob.ref_count = 1
+    db.session.flush()
+    return True
+
+def release_blob(file_path):
+    """
+    Drop one reference to the blob stored at file_path. Caller commits.
+    Returns True when no references remain and the physical file can be deleted.
+    Paths without a blob record (e.g. older uploads) are always safe to delete.
+    """
+    blob = FileBlob.query.filter_by(file_path=file_path).first()
+    if not blob:
+        return True
+
+    db.session.execute(
+        update(FileBlob).where(FileBlob.id == blob.id, FileBlob.ref_count > 0)
+        .values(ref_count=FileBlob.ref_count - 1)
+    )
+    db.session.refresh(blob)
+    if blob.ref_count <= 0:
+        db.session.delete(blob)
+        return True
+    return False
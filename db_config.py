@@ -0,0 +1,140 @@
+import os
+import threading
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.pool import NullPool
+
+# Alpha Nex Database Engine Profiles
+# Each gunicorn worker gets its own pool, so the database sees up to
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections. Size against
+# Postgres max_connections (or the PgBouncer pool) accordingly.
+
+_pool_stats_lock = threading.Lock()
+_pool_stats = {"connects": 0, "checkouts": 0, "checkins": 0, "invalidations": 0}
+
+def is_sqlite(database_url):
+    return database_url.startswith("sqlite")
+
+def is_postgres(database_url):
+    return database_url.startswith(("postgresql", "postgres://"))
+
+def normalize_database_url(database_url):
+    """SQLAlchemy needs postgresql://, but many hosts hand out postgres:// URLs."""
+    if database_url.startswith("postgres://"):
+        return "postgresql://" + database_url[len("postgres://"):]
+    return database_url
+
+def uses_pgbouncer():
+    return os.environ.get("DB_PGBOUNCER", "0") == "1"
+
+def get_engine_options(database_url):
+    """Engine options for SQLALCHEMY_ENGINE_OPTIONS based on the database type."""
+    if is_sqlite(database_url):
+        # Seconds sqlite3 waits on a locked database before raising "database is locked"
+        return {"connect_args": {"timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "15000")) / 1000}}
+
+    if not is_postgres(database_url):
+        return {}
+
+    if uses_pgbouncer():
+        # PgBouncer (transaction pooling) owns the pool; holding idle connections here
+        # would just pin server connections. Startup parameters like "options" are
+        # rejected by PgBouncer, so timeouts are applied per transaction instead.
+        return {
+            "poolclass": NullPool,
+            "pool_pre_ping": True,
+            "connect_args": {"application_name": "alphanex"},
+        }
+
+    statement_timeout = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    idle_timeout = int(os.environ.get("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", "60000"))
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "20")),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "300")),
+        "pool_pre_ping": True,
+        "connect_args": {
+            "application_name": "alphanex",
+            "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", "10")),
+            "options": f"-c statement_timeout={statement_timeout} "
+                       f"-c idle_in_transaction_session_timeout={idle_timeout}",
+        },
+    }
+
+def _count(stat):
+    with _pool_stats_lock:
+        _pool_stats[stat] += 1
+
+def register_engine_events(engine):
+    """Attach pool counters and, behind PgBouncer, per-transaction statement timeouts."""
+    event.listen(engine, "connect", lambda dbapi_conn, record: _count("connects"))
+    event.listen(engine, "checkout", lambda dbapi_conn, record, proxy: _count("checkouts"))
+    event.listen(engine, "checkin", lambda dbapi_conn, record: _count("checkins"))
+    event.listen(engine, "invalidate", lambda dbapi_conn, record, exc: _count("invalidations"))
+
+    if is_sqlite(str(engine.url)):
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        event.listen(engine, "connect", disable_pysqlite_begin)
+        event.listen(engine, "begin", begin_sqlite_transaction)
+
+    if is_postgres(str(engine.url)) and uses_pgbouncer():
+        statement_timeout = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+        @event.listens_for(engine, "begin")
+        def set_statement_timeout(conn):
+            # SET LOCAL ends with the transaction, so nothing leaks to other PgBouncer clients
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {statement_timeout}")
+
+def set_sqlite_pragmas(dbapi_conn, record):
+    """
+    Single-node SQLite profile: WAL lets readers run alongside the one writer,
+    synchronous=NORMAL is durable under WAL with far fewer fsyncs, and
+    busy_timeout makes writers queue instead of failing with "database is locked".
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '15000'))}")
+    cursor.execute(f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def disable_pysqlite_begin(dbapi_conn, record):
+    # pysqlite would emit its own deferred BEGIN before the first write; let the begin event do it
+    dbapi_conn.isolation_level = None
+
+def is_write_transaction():
+    """
+    Whether a new transaction should take SQLite's write lock up front: always
+    outside a request (job worker, CLI), else for unsafe methods or when the
+    view set g.db_write (a GET that writes).
+    """
+    if not has_request_context():
+        return True
+    return request.method not in ('GET', 'HEAD', 'OPTIONS') or g.get('db_write', False)
+
+def begin_sqlite_transaction(conn):
+    """
+    BEGIN IMMEDIATE for write transactions. A deferred transaction that reads and
+    then writes fails with SQLITE_BUSY_SNAPSHOT if another connection committed in
+    between, and busy_timeout does not retry that; IMMEDIATE queues for the write
+    lock at BEGIN instead. Reads keep a deferred BEGIN, so they never wait under WAL.
+    The sqlite_immediate execution option overrides the choice per connection.
+    """
+    immediate = conn.get_execution_options().get("sqlite_immediate")
+    if immediate is None:
+        immediate = is_write_transaction()
+    conn.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+def get_pool_stats(engine):
+    """Current pool occupancy plus lifetime checkout counters for this process."""
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    with _pool_stats_lock:
+        stats.update(_pool_stats)
+    return stats
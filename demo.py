@@ -0,0 +1,225 @@
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from flask import session
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+from app import db
+
+# Alpha Nex Demo Sessions
+# Visitors get a demo account without signing up. The review fixtures are shared
+# by every session and owned by a single fixture account, created once per
+# database. A visitor's own User row is only written on their first write
+# (upload, review, rating), so crawlers and health checks that only read pages
+# create no rows and hash no passwords.
+
+FIXTURE_USERNAME = 'demo_fixtures'
+DEMO_PASSWORD = 'demo123'
+
+DEMO_FIXTURES = [
+    {
+        'filename': 'sample_video_tutorial.mp4',
+        'original_filename': 'Python Programming Tutorial - Basics.mp4',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - A comprehensive tutorial covering Python programming fundamentals including variables, loops, and functions.',
+        'category': 'video',
+        'file_size': 15728640  # 15MB
+    },
+    {
+        'filename': 'machine_learning_paper.pdf',
+        'original_filename': 'Deep Learning in Computer Vision - Research Paper.pdf',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Academic research paper discussing the latest advances in deep learning techniques for computer vision applications.',
+        'category': 'document',
+        'file_size': 2097152  # 2MB
+    },
+    {
+        'filename': 'javascript_project.zip',
+        'original_filename': 'React E-commerce Project.zip',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Complete React.js e-commerce website project with shopping cart, user authentication, and payment integration.',
+        'category': 'code',
+        'file_size': 5242880  # 5MB
+    },
+    {
+        'filename': 'nature_sounds.mp3',
+        'original_filename': 'Relaxing Forest Sounds - 1 Hour.mp3',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - High-quality audio recording of peaceful forest sounds including birds chirping and gentle wind through trees.',
+        'category': 'audio',
+        'file_size': 8388608  # 8MB
+    },
+    {
+        'filename': 'website_design.png',
+        'original_filename': 'Modern UI Design Mockup.png',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Professional website design mockup showcasing modern UI/UX principles with clean layouts and responsive design.',
+        'category': 'image',
+        'file_size': 1048576  # 1MB
+    },
+    {
+        'filename': 'react_masterclass.mp4',
+        'original_filename': 'React.js Advanced Concepts.mp4',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - In-depth React.js tutorial covering hooks, context API, performance optimization, and advanced state management patterns.',
+        'category': 'video',
+        'file_size': 42000000  # 42MB
+    },
+    {
+        'filename': 'cybersecurity_podcast.wav',
+        'original_filename': 'Cybersecurity Weekly Episode 15.wav',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Latest cybersecurity trends discussion including zero-trust architecture, endpoint security, and threat intelligence.',
+        'category': 'audio',
+        'file_size': 28800000  # 28.8MB
+    },
+    {
+        'filename': 'api_documentation.pdf',
+        'original_filename': 'RESTful API Design Guide.pdf',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Comprehensive guide to designing scalable REST APIs with best practices, authentication methods, and documentation standards.',
+        'category': 'document',
+        'file_size': 3072000  # 3MB
+    },
+    {
+        'filename': 'algorithm_implementation.py',
+        'original_filename': 'data_structures_algorithms.py',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Python implementation of essential data structures and algorithms including binary trees, graphs, and dynamic programming.',
+        'category': 'code',
+        'file_size': 256000  # 256KB
+    },
+    {
+        'filename': 'database_schema.png',
+        'original_filename': 'E-commerce Database Design.png',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Detailed database schema diagram for a scalable e-commerce platform with proper normalization and indexing strategies.',
+        'category': 'image',
+        'file_size': 1536000  # 1.5MB
+    },
+    {
+        'filename': 'devops_tutorial.avi',
+        'original_filename': 'Docker & Kubernetes Tutorial.avi',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Complete DevOps tutorial covering containerization with Docker, orchestration with Kubernetes, and CI/CD pipeline setup.',
+        'category': 'video',
+        'file_size': 38400000  # 38.4MB
+    },
+    {
+        'filename': 'tech_interview.m4a',
+        'original_filename': 'Software Engineering Interview Prep.m4a',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Mock technical interview session covering system design, coding challenges, and behavioral questions for senior developers.',
+        'category': 'audio',
+        'file_size': 22528000  # 22.5MB
+    },
+    {
+        'filename': 'ml_research_notes.txt',
+        'original_filename': 'Machine Learning Research Notes.txt',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Detailed notes on latest machine learning research including transformer architectures, attention mechanisms, and neural networks.',
+        'category': 'document',
+        'file_size': 512000  # 512KB
+    },
+    {
+        'filename': 'web_performance.js',
+        'original_filename': 'performance_optimization_utils.js',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - JavaScript utilities for web performance optimization including lazy loading, code splitting, and cache management.',
+        'category': 'code',
+        'file_size': 307200  # 300KB
+    },
+    {
+        'filename': 'system_architecture.svg',
+        'original_filename': 'Microservices Architecture Diagram.svg',
+        'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Scalable microservices architecture diagram showing service communication, load balancing, and database distribution.',
+        'category': 'image',
+        'file_size': 204800  # 200KB
+    }
+]
+
+_fixture_owner_id = None
+
+@lru_cache(maxsize=1)
+def demo_password_hash():
+    """Hash of the shared demo password, computed once per process instead of per visitor."""
+    return generate_password_hash(DEMO_PASSWORD)
+
+def _new_user(username, name, email, xp_points):
+    from models import User
+
+    now = datetime.utcnow()
+    user = User()
+    user.username = username
+    user.name = name
+    user.email = email
+    user.password_hash = demo_password_hash()
+    user.xp_points = xp_points
+    user.is_banned = False
+    user.created_at = now
+    user.daily_upload_count = 0
+    user.daily_upload_bytes = 0
+    user.daily_review_count = 0
+    user.daily_upload_reset = now
+    user.daily_review_reset = now
+    return user
+
+def ensure_demo_fixtures():
+    """
+    Create the fixture account and any missing fixture uploads, in one bulk insert.
+    Runs its queries once per process; later calls return the cached owner id.
+    """
+    global _fixture_owner_id
+    if _fixture_owner_id is not None:
+        return _fixture_owner_id
+
+    from models import User, Upload
+
+    owner_id = db.session.execute(select(User.id).where(User.username == FIXTURE_USERNAME)).scalar()
+    if owner_id is None:
+        owner = _new_user(FIXTURE_USERNAME, 'Test User', 'demo_fixtures@alphanex.com', 300)
+        try:
+            db.session.add(owner)
+            db.session.commit()
+            owner_id = owner.id
+        except IntegrityError:
+            # Another worker created it first
+            db.session.rollback()
+            owner_id = db.session.execute(select(User.id).where(User.username == FIXTURE_USERNAME)).scalar()
+
+    existing = set(db.session.execute(select(Upload.filename).where(Upload.user_id == owner_id)).scalars())
+    rows = [{
+        'user_id': owner_id,
+        'filename': f"demo_{fixture['filename']}",
+        'original_filename': fixture['original_filename'],
+        'file_path': f"uploads/demo_{fixture['filename']}",
+        'file_size': fixture['file_size'],
+        'description': fixture['description'],
+        'category': fixture['category'],
+        'status': 'pending',
+        'ai_consent': True,
+    } for fixture in DEMO_FIXTURES if f"demo_{fixture['filename']}" not in existing]
+    if rows:
+        db.session.execute(insert(Upload), rows)
+        db.session.commit()
+
+    _fixture_owner_id = owner_id
+    return owner_id
+
+def is_demo_fixture(upload):
+    """Fixtures are shared by every session, so reviews of them never count toward a decision."""
+    return upload.user_id == ensure_demo_fixtures()
+
+def get_demo_user():
+    """
+    The session's demo user. A visitor who has not written anything yet gets a
+    transient (unsaved, id None) user with the starting balance; pass it to
+    materialize_demo_user() before writing rows that reference it.
+    """
+    from models import User
+
+    ensure_demo_fixtures()
+    user_id = session.get('demo_user_id')
+    user = db.session.get(User, user_id) if user_id else None
+    if user is None:
+        random_id = uuid.uuid4().hex[:8]
+        user = _new_user(f'demo_user_{random_id}', 'Demo User', f'demo_{random_id}@alphanex.com', 500)
+    return user
+
+def materialize_demo_user(user):
+    """
+    Save a transient demo user and bind it to the session. Commits straight away,
+    so the session never holds the id of a row that was rolled back.
+    """
+    if user.id is None:
+        db.session.add(user)
+        db.session.commit()
+        session['demo_user_id'] = user.id
+    return user
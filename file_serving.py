@@ -0,0 +1,83 @@
+import mimetypes
+import os
+from flask import current_app, request, send_file, Response
+from werkzeug.utils import safe_join
+
+# Alpha Nex File Serving
+# Stored uploads are served with strong ETags from their content hash, Range
+# support (video seeking) and conditional GETs. With FILE_OFFLOAD set, the
+# front-end server sends the bytes and the Python worker only writes headers:
+#   x-sendfile        Apache mod_xsendfile / lighttpd (X-Sendfile)
+#   x-accel-redirect  nginx internal location mapped onto UPLOAD_FOLDER
+# Without offload, send_file hands the open file to the WSGI server's
+# file_wrapper (gunicorn uses sendfile(2)), so files are never read into memory.
+# Uploads are untrusted and served from the app's own origin: only formats on
+# INLINE_EXTENSIONS open in the browser (SVG and HTML can carry script), and every
+# response is sandboxed and marked nosniff. Files are per-session, so caches are private.
+
+# Raster images, video and audio that browsers render without running content
+INLINE_EXTENSIONS = {
+    'jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp', 'ico',
+    'mp4', 'webm', 'ogv', 'mov',
+    'mp3', 'wav', 'aac', 'm4a', 'flac', 'ogg', 'opus',
+}
+
+def _accel_redirect_path(abs_path):
+    """Internal nginx URI for a file under UPLOAD_FOLDER, or None if it lives elsewhere."""
+    upload_root = os.path.abspath(current_app.config["UPLOAD_FOLDER"])
+    relative = os.path.relpath(abs_path, upload_root)
+    if relative.startswith(os.pardir):
+        return None
+    return safe_join(current_app.config["X_ACCEL_PREFIX"], relative.replace(os.sep, "/"))
+
+def _harden(response, max_age):
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["Content-Security-Policy"] = "sandbox"
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    return response
+
+def send_stored_file(file_path, digest=None, download_name=None, as_attachment=False, max_age=None):
+    """
+    Response for a stored file. digest (sha256 hex) becomes a strong ETag; without
+    one the ETag falls back to Werkzeug's mtime/size tag. Returns 304/206/416 as the
+    request's conditional and Range headers require.
+    """
+    abs_path = os.path.abspath(file_path)
+    name = download_name or os.path.basename(abs_path)
+    if max_age is None:
+        max_age = current_app.config["FILE_MAX_AGE"]
+    etag = digest if digest else True
+
+    accel_path = None
+    if current_app.config["FILE_OFFLOAD"] == "x-accel-redirect":
+        accel_path = _accel_redirect_path(abs_path)
+
+    if not accel_path:
+        # Handles Range, If-Range, If-None-Match and If-Modified-Since; with
+        # USE_X_SENDFILE it emits X-Sendfile instead of a body
+        response = send_file(abs_path, download_name=name, as_attachment=as_attachment,
+                             conditional=True, etag=etag, max_age=max_age)
+        return _harden(response, max_age)
+
+    # nginx applies Range itself on the internal redirect; conditional requests are
+    # answered here so revalidations never reach the disk
+    stat = os.stat(abs_path)
+    response = Response(status=200, mimetype=mimetypes.guess_type(name)[0] or "application/octet-stream")
+    response.headers["X-Accel-Redirect"] = accel_path
+    response.headers.set("Content-Disposition", "attachment" if as_attachment else "inline", filename=name)
+    response.last_modified = int(stat.st_mtime)
+    response.set_etag(digest or f"{int(stat.st_mtime)}-{stat.st_size}")
+    _harden(response, max_age)
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        # nginx would follow the redirect and send the body anyway
+        del response.headers["X-Accel-Redirect"]
+    return response
+
+def is_inline_media(filename):
+    """Raster images, video and audio open in the browser; everything else (SVG included) downloads."""
+    if not filename or '.' not in filename:
+        return False
+    return filename.rsplit('.', 1)[1].lower() in INLINE_EXTENSIONS
@@ -1,7 +1,7 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileRequired
-from wtforms import StringField, PasswordField, TextAreaField, SelectField, SubmitField
-from wtforms.validators import DataRequired, Email, EqualTo, Length
+from wtforms import StringField, PasswordField, TextAreaField, SelectField, SubmitField, BooleanField, RadioField
+from wtforms.validators import DataRequired, Email, EqualTo, Length, Optional
 from wtforms.widgets import TextArea
 
 class LoginForm(FlaskForm):
@@ -27,6 +27,7 @@ class UploadForm(FlaskForm):
         ('text', 'Text Files'),
         ('other', 'Other')
     ], validators=[DataRequired()])
+    ai_consent = BooleanField('Allow AI quality analysis of this upload')
     submit = SubmitField('Upload File')
 
 class ReviewForm(FlaskForm):
@@ -34,5 +35,19 @@ class ReviewForm(FlaskForm):
         ('good', 'Good Quality'),
         ('bad', 'Poor Quality')
     ], validators=[DataRequired()])
-    comment = TextAreaField('Comment', validators=[Length(max=500)])
-    submit = SubmitField('Submit Review')
\ No newline at end of file
+    description = TextAreaField('Comment', validators=[Length(max=500)])
+    submit = SubmitField('Submit Review')
+
+class RatingForm(FlaskForm):
+    rating = RadioField('Overall Rating', choices=[(str(i), str(i)) for i in range(1, 6)],
+                        coerce=int, validators=[DataRequired()])
+    category = SelectField('Feedback Category', choices=[
+        ('general', 'General Feedback'),
+        ('bug', 'Bug Report'),
+        ('feature', 'Feature Request'),
+        ('usability', 'Usability'),
+        ('content', 'Content Quality')
+    ], validators=[DataRequired()])
+    description = TextAreaField('Your Feedback', validators=[DataRequired(), Length(min=10, max=2000)])
+    contact_email = StringField('Contact Email', validators=[Optional(), Email()])
+    submit = SubmitField('Submit Feedback')
\ No newline at end of file
@@ -1,16 +1,39 @@
 # Gunicorn configuration for production deployment
-import multiprocessing
 import os
 
+# With preload_app the app is imported in the master, before gunicorn patches each
+# gevent worker - by then ssl, threading locks and socket users already exist
+# unpatched. Patch here, as the config is loaded, ahead of every other import.
+if os.getenv("SERVING_MODE", "sync") == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+import glob
+import multiprocessing
+
 # Server socket
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
 backlog = 2048
 
+# Serving mode: "sync" (default), "gthread" or "gevent"
+# - sync: one request per worker process
+# - gthread: GUNICORN_THREADS requests per worker, each in its own thread
+# - gevent: up to worker_connections requests per worker as greenlets; slow OpenAI
+#   calls, uploads and SSE streams yield instead of pinning the worker.
+#   Needs the optional gevent dependencies: pip install ".[gevent]"
+serving_mode = os.getenv("SERVING_MODE", "sync")
+
 # Worker processes
-workers = min(multiprocessing.cpu_count() * 2 + 1, 4)
-worker_class = "sync"
-worker_connections = 1000
-timeout = 30
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+if serving_mode == "gevent":
+    worker_class = "gevent"
+elif serving_mode == "gthread":
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", "16"))
+else:
+    worker_class = "sync"
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", "1000"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30" if worker_class == "sync" else "120"))
 keepalive = 2
 
 # Restart workers after this many requests, to help prevent memory leaks
@@ -23,6 +46,30 @@ errorlog = "-"
 loglevel = "info"
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
 
+# Metrics: each worker writes Prometheus samples here and /metrics merges them.
+# Must exist before the app (and prometheus_client) is imported. Sample files
+# (<type>_<pid>.db) left by processes that are gone are removed so a previous run
+# is not merged into this one; anything else in the directory, and the files of
+# live processes such as worker.py, is left alone.
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return pid != os.getpid()
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/alphanex-metrics")
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+for path in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*_*.db")):
+    pid = os.path.basename(path)[:-3].rsplit("_", 1)[1]
+    if not (pid.isdigit() and _process_alive(int(pid))):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 # Process naming
 proc_name = "alphanex"
 
@@ -36,4 +83,23 @@ tmp_upload_dir = None
 
 # SSL (uncomment if using HTTPS)
 # keyfile = None
-# certfile = None
\ No newline at end of file
+# certfile = None
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+def post_fork(server, worker):
+    # Make psycopg2 cooperative under gevent so database waits yield too
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen not installed - Postgres queries will block gevent workers")
+
+    # With preload_app the master opened connections while importing the app;
+    # drop them from this worker's pool without closing the master's sockets
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
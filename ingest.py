@@ -0,0 +1,135 @@
+import hashlib
+import io
+import os
+import tempfile
+import time
+from flask import current_app, Request
+from utils import matches_magic_bytes
+from metrics import observe_upload
+
+# Alpha Nex Streaming Upload Ingest
+# Multipart file parts are written straight into a temp file inside UPLOAD_FOLDER
+# while being hashed, sized and sniffed, so an accepted upload is stored with a
+# single rename (to its sharded key, see storage.py) instead of being spooled,
+# re-read for its size and copied again. The size cap, the remaining daily quota
+# and the file type (magic bytes, once HEAD_BYTES have arrived) are checked as the
+# bytes come in, so a bad upload is cut off early instead of after the whole body.
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+HEAD_BYTES = 512  # Enough for every magic-byte signature we check
+
+QUOTA_MESSAGE = 'Upload would exceed daily limits (3 uploads/day or 500MB total).'
+TYPE_MESSAGE = 'File contents do not match its extension.'
+
+class UploadRejected(Exception):
+    """Raised when an upload fails a size, quota or file type check."""
+
+def too_large_message(max_bytes):
+    return f'File too large! Maximum file size is {max_bytes // (1024 * 1024)}MB per upload.'
+
+class IngestFile(io.FileIO):
+    """Writable temp file that hashes, counts and sniffs bytes as they are written."""
+
+    def __init__(self, directory, max_bytes, filename=None, quota_bytes=None):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix='.incoming-', suffix='.part')
+        super().__init__(fd, 'r+')
+        self.max_bytes = max_bytes
+        self.filename = filename
+        self.quota_bytes = quota_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+        self.committed = False
+        self.started = time.perf_counter()
+
+    def write(self, data):
+        # Each rejection closes (and so deletes) the partial file before raising
+        if self.size + len(data) > self.max_bytes:
+            self.close()
+            raise UploadRejected(too_large_message(self.max_bytes))
+        if self.quota_bytes is not None and self.size + len(data) > self.quota_bytes:
+            self.close()
+            raise UploadRejected(QUOTA_MESSAGE)
+        if len(self.head) < HEAD_BYTES:
+            self.head += bytes(data[:HEAD_BYTES - len(self.head)])
+            if len(self.head) >= HEAD_BYTES and self.filename and not matches_magic_bytes(self.filename, self.head):
+                self.close()
+                raise UploadRejected(TYPE_MESSAGE)
+        self.digest.update(data)
+        self.size += len(data)
+        return super().write(data)
+
+    def commit(self, storage, key):
+        """Hand the finished file to the storage backend. Returns its local path."""
+        os.fsync(self.fileno())
+        file_path = storage.put_file(self.path, key)
+        self.committed = True
+        return file_path
+
+    def close(self):
+        super().close()
+        if not self.committed:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+class IngestRequest(Request):
+    """
+    Request class that streams multipart file parts into IngestFile containers.
+    A view can set request.ingest_quota_bytes (the user's remaining daily bytes)
+    before it first touches the form, to cut off uploads that would exceed it.
+    Rejections raise UploadRejected from form parsing. A body over MAX_CONTENT_LENGTH
+    still raises werkzeug's RequestEntityTooLarge, so views catch both.
+    """
+    ingest_quota_bytes = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        upload_folder = current_app.config.get('UPLOAD_FOLDER')
+        if not upload_folder or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return IngestFile(upload_folder, current_app.config['MAX_UPLOAD_BYTES'], filename, self.ingest_quota_bytes)
+
+def store_upload(file, storage, max_bytes, within_quota=None, before_store=None):
+    """
+    Validate and store an uploaded FileStorage in one pass, under the content-addressed
+    key for its hash. within_quota(size) is checked as bytes arrive (or once, if they
+    were already streamed during request parsing). before_store(digest, size, file_path)
+    runs once the file is valid but before it is moved to its shared path; raising
+    UploadRejected there drops it. Returns tuple of (sha256_hex_digest, size, file_path).
+    Raises UploadRejected on size, quota or file type failures; nothing is left on disk.
+    """
+    stream = file.stream
+    if isinstance(stream, IngestFile) and not stream.closed:
+        ingest = stream
+    else:
+        # File was not streamed by IngestRequest - copy it through an IngestFile
+        ingest = IngestFile(current_app.config['UPLOAD_FOLDER'], max_bytes, file.filename)
+        stream.seek(0)
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            ingest.write(chunk)  # Closes (and deletes) the temp file before raising UploadRejected
+            if within_quota and not within_quota(ingest.size):
+                break
+
+    try:
+        if ingest.size > max_bytes:
+            raise UploadRejected(too_large_message(max_bytes))
+        if within_quota and not within_quota(ingest.size):
+            raise UploadRejected(QUOTA_MESSAGE)
+        if not matches_magic_bytes(file.filename, ingest.head):
+            raise UploadRejected(TYPE_MESSAGE)
+        digest = ingest.digest.hexdigest()
+        key = storage.key_for(digest, file.filename)
+        if before_store:
+            before_store(digest, ingest.size, storage.local_path(key))
+        file_path = ingest.commit(storage, key)
+        observe_upload(ingest.size, time.perf_counter() - ingest.started)
+    finally:
+        if ingest is not stream:
+            ingest.close()
+
+    return digest, ingest.size, file_path
@@ -0,0 +1,150 @@
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, update
+from app import db
+from models import AnalysisJob
+
+# Alpha Nex Database-backed Job Queue
+
+JOB_HANDLERS = {}
+
+def job_handler(job_type):
+    """Register a function as the handler for a job type."""
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+def enqueue_job(job_type, payload, max_attempts=None):
+    """
+    Add a job to the queue. The job is only added to the session, so it
+    commits atomically with whatever the caller is already writing.
+    """
+    job = AnalysisJob()
+    job.job_type = job_type
+    job.payload = payload
+    job.status = 'queued'
+    job.max_attempts = max_attempts or current_app.config['JOB_MAX_ATTEMPTS']
+    job.run_after = datetime.utcnow()
+    db.session.add(job)
+    return job
+
+def get_retry_delay(attempts):
+    """Exponential backoff in seconds for the given attempt number."""
+    base = current_app.config['JOB_RETRY_BASE_SECONDS']
+    return min(base * (2 ** max(0, attempts - 1)), current_app.config['JOB_RETRY_MAX_SECONDS'])
+
+def release_stale_jobs():
+    """
+    Requeue jobs left running by a worker that died mid-job. A job that has
+    already used all its attempts is failed instead, so one that crashes its
+    worker every time stops being picked up.
+    """
+    now = datetime.utcnow()
+    stale = (AnalysisJob.status == 'running',
+             AnalysisJob.locked_at < now - timedelta(seconds=current_app.config['JOB_LOCK_TIMEOUT']))
+    db.session.execute(
+        update(AnalysisJob)
+        .where(*stale, AnalysisJob.attempts >= AnalysisJob.max_attempts)
+        .values(status='failed', locked_at=None, finished_at=now,
+                last_error='Worker stopped while running the job on its last attempt')
+    )
+    result = db.session.execute(
+        update(AnalysisJob)
+        .where(*stale)
+        .values(status='queued', locked_at=None)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def claim_next_job():
+    """
+    Claim the oldest runnable job. The conditional UPDATE makes the claim safe
+    when several workers poll the same table. Returns None if nothing is ready.
+    """
+    now = datetime.utcnow()
+    candidates = db.session.query(AnalysisJob.id).filter(
+        AnalysisJob.status == 'queued',
+        AnalysisJob.run_after <= now
+    ).order_by(AnalysisJob.run_after, AnalysisJob.id).limit(5).all()
+
+    for (job_id,) in candidates:
+        result = db.session.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, AnalysisJob.status == 'queued')
+            .values(status='running', locked_at=now, attempts=AnalysisJob.attempts + 1)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return db.session.get(AnalysisJob, job_id)
+
+    # Nothing claimed: end the read, or an idle worker would sleep holding SQLite's write lock
+    db.session.rollback()
+    return None
+
+def run_job(job):
+    """Run a claimed job and record success, retry or permanent failure."""
+    handler = JOB_HANDLERS.get(job.job_type)
+    if not handler:
+        # Retrying cannot help until a handler is deployed
+        current_app.logger.error(f"Job {job.id}: no handler registered for job type '{job.job_type}'")
+        job.status = 'failed'
+        job.finished_at = datetime.utcnow()
+        job.last_error = f"No handler registered for job type '{job.job_type}'"
+        job.locked_at = None
+        db.session.commit()
+        return
+
+    try:
+        handler(job.payload or {})
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        job.last_error = None
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Job {job.id} ({job.job_type}) failed: {e}")
+        job.last_error = str(e)[:2000]
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'queued'
+            job.run_after = datetime.utcnow() + timedelta(seconds=get_retry_delay(job.attempts))
+
+    job.locked_at = None
+    db.session.commit()
+
+def prune_finished_jobs(max_age_days=None):
+    """Delete done/failed jobs finished more than JOB_RETENTION_DAYS ago. Returns the number removed."""
+    max_age_days = max_age_days or current_app.config['JOB_RETENTION_DAYS']
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    result = db.session.execute(
+        delete(AnalysisJob)
+        .where(AnalysisJob.status.in_(['done', 'failed']), AnalysisJob.finished_at < cutoff)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def run_worker(poll_interval=None, max_jobs=None):
+    """Drain the queue until stopped (or max_jobs have run). Needs an app context."""
+    poll_interval = poll_interval or current_app.config['JOB_POLL_INTERVAL']
+    processed = 0
+    last_stale_check = 0
+
+    while max_jobs is None or processed < max_jobs:
+        if time.monotonic() - last_stale_check > current_app.config['JOB_LOCK_TIMEOUT']:
+            release_stale_jobs()
+            last_stale_check = time.monotonic()
+
+        job = claim_next_job()
+        if not job:
+            if max_jobs is not None:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        processed += 1
+
+    return processed
@@ -0,0 +1,104 @@
+import hmac
+import os
+import time
+from flask import abort, current_app, g, has_request_context, request, Response
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY,
+                               generate_latest, multiprocess)
+from sqlalchemy import event
+
+# Alpha Nex Metrics
+# Prometheus metrics for requests, SQL, OpenAI calls and uploads. Under gunicorn
+# every worker is a separate process, so PROMETHEUS_MULTIPROC_DIR (set in
+# gunicorn.conf.py) makes each process write its samples to shared files and
+# /metrics merges them. worker.py reports into the same directory when it is set
+# in its environment too.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+OPENAI_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+REQUEST_LATENCY = Histogram('alphanex_request_duration_seconds', 'Request latency by endpoint',
+                            ['endpoint', 'method'], buckets=LATENCY_BUCKETS)
+REQUESTS = Counter('alphanex_requests_total', 'Requests by endpoint and status class',
+                   ['endpoint', 'method', 'status'])
+SQL_QUERIES = Histogram('alphanex_request_sql_queries', 'SQL statements executed per request',
+                        ['endpoint'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100))
+SQL_TIME = Histogram('alphanex_request_sql_seconds', 'Time spent in SQL per request',
+                     ['endpoint'], buckets=LATENCY_BUCKETS)
+OPENAI_LATENCY = Histogram('alphanex_openai_request_duration_seconds', 'OpenAI API call latency',
+                           ['function'], buckets=OPENAI_BUCKETS)
+OPENAI_TOKENS = Counter('alphanex_openai_tokens_total', 'OpenAI tokens used', ['function', 'kind'])
+OPENAI_ERRORS = Counter('alphanex_openai_errors_total', 'Failed OpenAI API calls', ['function', 'error'])
+UPLOAD_BYTES = Counter('alphanex_upload_bytes_total', 'Bytes received in accepted uploads')
+UPLOAD_THROUGHPUT = Histogram('alphanex_upload_bytes_per_second', 'Per-upload receive rate',
+                              buckets=(64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6))
+
+def _endpoint():
+    # Route names, not URLs, keep label cardinality bounded
+    return request.endpoint or 'unmatched'
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_seconds = 0.0
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None or request.endpoint == 'metrics':
+        return response
+    endpoint = _endpoint()
+    REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+    REQUESTS.labels(endpoint, request.method, f"{response.status_code // 100}xx").inc()
+    SQL_QUERIES.labels(endpoint).observe(g.pop('sql_queries', 0))
+    SQL_TIME.labels(endpoint).observe(g.pop('sql_seconds', 0.0))
+    return response
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context() and 'sql_queries' in g:
+        # SQLite's explicit BEGIN (see db_config) is timed, since it can wait on the write lock,
+        # but not counted, so queries per request compare across databases
+        if not statement.startswith('BEGIN'):
+            g.sql_queries += 1
+        g.sql_seconds += elapsed
+
+def init_metrics(app, engine):
+    """Attach request and SQL instrumentation and the /metrics endpoint."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+def metrics_view():
+    """
+    Prometheus scrape endpoint, merged across worker processes when running multi-process.
+    Needs "Authorization: Bearer <METRICS_TOKEN>"; without a configured token it is off (404).
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+def record_openai_call(function, seconds, usage=None, error=None):
+    """Latency for every call; token usage on success, error type on failure."""
+    OPENAI_LATENCY.labels(function).observe(seconds)
+    if error is not None:
+        OPENAI_ERRORS.labels(function, type(error).__name__).inc()
+    elif usage is not None:
+        OPENAI_TOKENS.labels(function, 'prompt').inc(usage.prompt_tokens or 0)
+        OPENAI_TOKENS.labels(function, 'completion').inc(usage.completion_tokens or 0)
+
+def observe_upload(size, seconds):
+    UPLOAD_BYTES.inc(size)
+    if seconds > 0:
+        UPLOAD_THROUGHPUT.observe(size / seconds)
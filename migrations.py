@@ -0,0 +1,177 @@
+import re
+from datetime import datetime
+from sqlalchemy import inspect, text
+from app import app, db
+
+# Alpha Nex Schema Migrations
+# Versioned, append-only schema changes applied with: flask --app main db-upgrade
+# db.create_all() only creates missing tables; indexes and constraints on
+# existing tables are added here. Never edit a migration that has shipped -
+# add a new one instead.
+# On Postgres, migrations run with statement_timeout off, and CREATE INDEX
+# statements are built CONCURRENTLY (outside any transaction, after the
+# migration's other statements) so writes to the table are not blocked while
+# they build. Keep index statements last in a migration and idempotent.
+# Run db-upgrade against the database directly, not through PgBouncer.
+
+_CREATE_INDEX = re.compile(r"^CREATE (UNIQUE )?INDEX IF NOT EXISTS (\w+) ")
+
+def _fts5_statements(table, columns):
+    """
+    SQLite: external-content FTS5 index <table>_fts over the given columns, kept
+    in sync by triggers and filled from existing rows.
+    """
+    fts_table = f"{table}_fts"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete_old = (f"INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) "
+                  f"VALUES ('delete', old.id, {old_values});")
+    insert_new = f"INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({column_list}, "
+        f"content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')",
+    ]
+
+def _tsvector_statements(table, weighted_columns):
+    """
+    Postgres: generated search_vector column (weights A-D per column) with a GIN
+    index. The database recomputes it on every write, so it cannot drift.
+    """
+    vector = " || ".join(f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')"
+                         for column, weight in weighted_columns)
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)",
+    ]
+
+# (version, description, tables it needs, statements - a list, or a dict keyed by dialect name)
+MIGRATIONS = [
+    (1, "Indexes for upload listing, review and strike lookups", ("upload", "review", "strike"), [
+        # Per-user upload history and quota checks, newest first
+        "CREATE INDEX IF NOT EXISTS ix_upload_user_id_uploaded_at ON upload (user_id, uploaded_at)",
+        # Review queue / admin moderation: filter by status, order by age
+        "CREATE INDEX IF NOT EXISTS ix_upload_status_uploaded_at ON upload (status, uploaded_at)",
+        # Vote tallies group by rating within one upload
+        "CREATE INDEX IF NOT EXISTS ix_review_upload_id_rating ON review (upload_id, rating)",
+        # Reviewer history on the dashboard
+        "CREATE INDEX IF NOT EXISTS ix_review_reviewer_id_created_at ON review (reviewer_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_strike_user_id_created_at ON strike (user_id, created_at)",
+        # Admin "recent strikes" panel
+        "CREATE INDEX IF NOT EXISTS ix_strike_created_at ON strike (created_at)",
+    ]),
+    (2, "One review per reviewer per upload", ("review",), [
+        # Keep the earliest review from any duplicate pairs so the unique index can build
+        "DELETE FROM review WHERE id NOT IN "
+        "(SELECT MIN(id) FROM review GROUP BY upload_id, reviewer_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_review_upload_id_reviewer_id ON review (upload_id, reviewer_id)",
+    ]),
+    (3, "Content feed index for databases created before it was declared", ("content",), [
+        "CREATE INDEX IF NOT EXISTS ix_content_created_at_id ON content (created_at, id)",
+    ]),
+    (4, "Full-text search over content", ("content",), {
+        "sqlite": _fts5_statements("content", ["title", "description", "category"]),
+        "postgresql": _tsvector_statements("content", [("title", "A"), ("category", "B"), ("description", "C")]),
+    }),
+    (5, "Full-text search over upload descriptions and file names", ("upload",), {
+        "sqlite": _fts5_statements("upload", ["original_filename", "description"]),
+        "postgresql": _tsvector_statements("upload", [("original_filename", "A"), ("description", "C")]),
+    }),
+]
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, description VARCHAR(200) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+    ))
+
+def get_applied_versions():
+    with db.engine.begin() as conn:
+        _ensure_version_table(conn)
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+def _drop_invalid_index(conn, name):
+    """A failed concurrent build leaves an INVALID index that IF NOT EXISTS would keep."""
+    invalid = conn.execute(text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+def _apply_postgres(version, description, statements):
+    """Other statements in one transaction, then each index built concurrently, then the version row."""
+    indexes = [statement for statement in statements if _CREATE_INDEX.match(statement)]
+    others = [statement for statement in statements if not _CREATE_INDEX.match(statement)]
+
+    with db.engine.begin() as conn:
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        for statement in others:
+            conn.execute(text(statement))
+
+    if indexes:
+        with db.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text("SET statement_timeout = 0"))
+            try:
+                for statement in indexes:
+                    _drop_invalid_index(conn, _CREATE_INDEX.match(statement).group(2))
+                    conn.execute(text(statement.replace(" INDEX IF NOT EXISTS ",
+                                                        " INDEX CONCURRENTLY IF NOT EXISTS ", 1)))
+            finally:
+                # Session setting; don't hand a pooled connection back without the app's timeout
+                conn.execute(text("RESET statement_timeout"))
+
+    with db.engine.begin() as conn:
+        _record_version(conn, version, description)
+
+def _record_version(conn, version, description):
+    conn.execute(text(
+        "INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"
+    ), {"v": version, "d": description, "t": datetime.utcnow()})
+
+def upgrade():
+    """
+    Apply pending migrations in order, each in its own transaction (on Postgres,
+    index builds run concurrently outside it). Returns the versions applied.
+    """
+    applied = get_applied_versions()
+    existing_tables = set(inspect(db.engine).get_table_names())
+    done = []
+
+    for version, description, tables, statements in MIGRATIONS:
+        if version in applied:
+            continue
+        missing = [table for table in tables if table not in existing_tables]
+        if missing:
+            # Left pending so it applies once the tables exist
+            print(f"Migration {version} skipped: missing tables {', '.join(missing)}")
+            continue
+
+        if isinstance(statements, dict):
+            statements = statements.get(db.engine.dialect.name, [])
+        if db.engine.dialect.name == "postgresql":
+            _apply_postgres(version, description, statements)
+        else:
+            with db.engine.begin() as conn:
+                for statement in statements:
+                    conn.execute(text(statement))
+                _record_version(conn, version, description)
+        print(f"Migration {version} applied: {description}")
+        done.append(version)
+
+    return done
+
+@app.cli.command("db-upgrade")
+def db_upgrade_command():
+    """Create missing tables, then apply pending schema migrations."""
+    db.create_all()
+    applied = upgrade()
+    if not applied:
+        print("No migrations applied")
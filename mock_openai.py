@@ -0,0 +1,114 @@
+# Alpha Nex - Local OpenAI Stand-in for Benchmarks
+# Answers POST /v1/chat/completions with plausible JSON for each prompt
+# openai_service sends, after a configurable delay, failing a configurable
+# share of calls. Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1
+#   python mock_openai.py --port 8099 --latency 0.8 --jitter 0.3 --failure-rate 0.02
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def _moderation_result():
+    return {"appropriate": True, "confidence": round(random.uniform(0.6, 0.95), 2),
+            "category_match": True, "issues": [], "suggestions": []}
+
+def _scores_for(prompt):
+    """Fake result object for the kind of analysis the prompt asks for."""
+    if '"results"' in prompt:
+        # Batch prompt: numbered items, one result per index
+        count = len(re.findall(r'^\s*\d+\. "', prompt, re.MULTILINE))
+        if 'quality_score' in prompt:
+            item = lambda i: {"index": i, "quality_score": round(random.uniform(0.4, 0.9), 2)}
+        else:
+            item = lambda i: {"index": i, "duplicate_score": round(random.uniform(0, 0.3), 2),
+                              "spam_score": round(random.uniform(0, 0.3), 2)}
+        return {"results": [item(i) for i in range(count)]}
+    if 'duplicate_score' in prompt:
+        return {"duplicate_score": round(random.uniform(0, 0.3), 2), "spam_score": round(random.uniform(0, 0.3), 2)}
+    if 'category_match' in prompt:
+        return _moderation_result()
+    return {"quality_score": round(random.uniform(0.4, 0.9), 2)}
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 0.5
+    jitter = 0.0
+    failure_rate = 0.0
+    stats = {"calls": 0, "failures": 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The app shut down or timed out mid-call; nothing left to answer
+            pass
+
+    def do_GET(self):
+        # Harness reads call counts from here
+        with self.stats_lock:
+            self._send_json(200, dict(self.stats))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+        failed = random.random() < self.failure_rate
+        with self.stats_lock:
+            self.stats["calls"] += 1
+            self.stats["failures"] += failed
+        if failed:
+            status = random.choice([429, 500, 503])
+            self._send_json(status, {"error": {"message": "mock failure", "type": "server_error"}})
+            return
+
+        prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+        content = json.dumps(_scores_for(prompt))
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(content) // 4)
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{random.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+def start_mock_server(port=0, latency=0.5, jitter=0.0, failure_rate=0.0):
+    """Serve in a background thread. Returns the server; its port is server.server_address[1]."""
+    handler = type("ConfiguredMockOpenAIHandler", (MockOpenAIHandler,), {
+        "latency": latency, "jitter": jitter, "failure_rate": failure_rate,
+        "stats": {"calls": 0, "failures": 0}, "stats_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local OpenAI chat completions stand-in")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="standard deviation of the delay")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of calls answered with 429/5xx")
+    args = parser.parse_args()
+
+    server = start_mock_server(args.port, args.latency, args.jitter, args.failure_rate)
+    print(f"Mock OpenAI listening on http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
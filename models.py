@@ -1,4 +1,5 @@
-from datetime import datetime
+import mimetypes
+from datetime import datetime, timedelta
 from app import db
 
 class Content(db.Model):
@@ -7,6 +8,277 @@ class Content(db.Model):
     description = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Composite index backing the (created_at, id) keyset-paginated feed
+    __table_args__ = (
+        db.Index('ix_content_created_at_id', 'created_at', 'id'),
+    )
     
     def __repr__(self):
-        return f'<Content {self.title}>'
\ No newline at end of file
+        return f'<Content {self.title}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'category': self.category,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class AnalysisJob(db.Model):
+    """Persistent background job, drained by worker.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    # Workers poll for the oldest runnable job in a given state
+    __table_args__ = (
+        db.Index('ix_analysis_job_status_run_after', 'status', 'run_after'),
+    )
+
+    def __repr__(self):
+        return f'<AnalysisJob {self.id} {self.job_type} {self.status}>'
+
+
+class AIResultCache(db.Model):
+    """Shared tier of the AI moderation result cache (see ai_cache.py)"""
+    key = db.Column(db.String(64), primary_key=True)  # sha256 of function, model and inputs
+    function = db.Column(db.String(50), nullable=False)
+    value = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<AIResultCache {self.function} {self.key[:12]}>'
+
+
+class SimilaritySignature(db.Model):
+    """MinHash signature of an upload's description or file contents (see similarity.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.Integer, nullable=False, index=True)
+    source = db.Column(db.String(20), nullable=False)  # description, file
+    signature = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SimilaritySignature upload={self.upload_id} {self.source}>'
+
+
+class SimilarityBucket(db.Model):
+    """LSH band bucket of a MinHash signature - candidates share at least one bucket"""
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.Integer, nullable=False, index=True)
+    source = db.Column(db.String(20), nullable=False)
+    band = db.Column(db.Integer, nullable=False)
+    bucket = db.Column(db.BigInteger, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_similarity_bucket_lookup', 'source', 'band', 'bucket'),
+    )
+
+
+class FileBlob(db.Model):
+    """One stored file per distinct content hash, shared by reference count"""
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(64), nullable=False, unique=True)  # sha256 hex
+    file_path = db.Column(db.String(500), nullable=False, unique=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<FileBlob {self.digest[:12]} refs={self.ref_count}>'
+
+
+class ReviewTally(db.Model):
+    """Per-upload review counters, maintained in the same transaction as each review"""
+    upload_id = db.Column(db.Integer, primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+    good_count = db.Column(db.Integer, nullable=False, default=0)
+    bad_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ReviewTally upload={self.upload_id} {self.good_count}/{self.bad_count}>'
+
+
+class UserStatsCache(db.Model):
+    """Cached dashboard summary per user, emptied whenever the underlying data changes"""
+    user_id = db.Column(db.Integer, primary_key=True)
+    summary = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class UploadStatusEvent(db.Model):
+    """Append-only feed of upload status changes, streamed to uploaders over SSE"""
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    # SSE streams read "events for this user after the last id they saw"
+    __table_args__ = (
+        db.Index('ix_upload_status_event_user_id_id', 'user_id', 'id'),
+    )
+
+
+# Platform models: demo users, their uploads and the peer reviews, strikes,
+# ratings and admin records around them. Columns match the original schema
+# (instance/alphanex.db), so existing databases keep working.
+
+FREE_DELETION_HOURS = 48
+STRIKE_LIMIT = 3
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(64), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
+    is_verified = db.Column(db.Boolean, default=False)
+    xp_points = db.Column(db.Integer, default=0)
+    uploader_strikes = db.Column(db.Integer, default=0)
+    reviewer_strikes = db.Column(db.Integer, default=0)
+    is_banned = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    kyc_verified = db.Column(db.Boolean, default=False)
+    document_path = db.Column(db.String(255))
+    selfie_path = db.Column(db.String(255))
+    # Daily quota counters, bucketed by UTC day (see quota.py)
+    daily_upload_bytes = db.Column(db.Integer, default=0)
+    daily_upload_count = db.Column(db.Integer, default=0)
+    daily_upload_reset = db.Column(db.DateTime, default=datetime.utcnow)
+    daily_review_count = db.Column(db.Integer, default=0)
+    daily_review_reset = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def add_strike(self, strike_type, reason):
+        """Record an uploader/reviewer strike; the third of a kind bans the user. Caller commits."""
+        strike = Strike()
+        strike.user_id = self.id
+        strike.strike_type = strike_type
+        strike.reason = reason[:500]
+        db.session.add(strike)
+
+        if strike_type == 'uploader':
+            self.uploader_strikes = (self.uploader_strikes or 0) + 1
+            strikes = self.uploader_strikes
+        else:
+            self.reviewer_strikes = (self.reviewer_strikes or 0) + 1
+            strikes = self.reviewer_strikes
+        if strikes >= STRIKE_LIMIT:
+            self.is_banned = True
+        return strike
+
+    def __repr__(self):
+        return f'<User {self.username}>'
+
+
+class Upload(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    file_size = db.Column(db.Integer, nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, flagged, approved, rejected
+    ai_consent = db.Column(db.Boolean, default=False)
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    deletion_deadline = db.Column(db.DateTime, default=lambda: datetime.utcnow() + timedelta(hours=FREE_DELETION_HOURS))
+    duplicate_score = db.Column(db.Float, default=0.0)
+    spam_score = db.Column(db.Float, default=0.0)
+
+    user = db.relationship('User', backref='uploads')
+
+    @property
+    def file_type(self):
+        """MIME type guessed from the original file name, or its extension."""
+        guessed, _ = mimetypes.guess_type(self.original_filename or '')
+        if guessed:
+            return guessed
+        return self.original_filename.rsplit('.', 1)[1].lower() if '.' in (self.original_filename or '') else 'file'
+
+    def can_delete_free(self):
+        return datetime.utcnow() <= self.deletion_deadline
+
+    def get_deletion_penalty(self):
+        """XP charged for deleting after the free window - the same amount the upload earned."""
+        from utils import calculate_xp_reward
+        return 0 if self.can_delete_free() else calculate_xp_reward('upload')
+
+    def __repr__(self):
+        return f'<Upload {self.original_filename}>'
+
+
+class Review(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.Integer, db.ForeignKey('upload.id'), nullable=False)
+    reviewer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    rating = db.Column(db.String(10), nullable=False)  # good, bad
+    description = db.Column(db.Text, nullable=False, default='')
+    xp_earned = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_flagged = db.Column(db.Boolean, default=False)
+    quality_score = db.Column(db.Float)
+
+    upload = db.relationship('Upload')
+    reviewer = db.relationship('User')
+
+    def __repr__(self):
+        return f'<Review {self.rating} upload={self.upload_id}>'
+
+
+class Strike(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    strike_type = db.Column(db.String(20), nullable=False)  # uploader, reviewer
+    reason = db.Column(db.String(500), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    user = db.relationship('User')
+
+    def __repr__(self):
+        return f'<Strike {self.strike_type} user={self.user_id}>'
+
+
+class WithdrawalRequest(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    amount_xp = db.Column(db.Integer, nullable=False)
+    amount_usd = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), default='pending')
+    payment_method = db.Column(db.String(100))
+    payment_details = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+    admin_notes = db.Column(db.Text)
+
+
+class AdminAction(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    action_type = db.Column(db.String(50), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Rating(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    contact_email = db.Column(db.String(120))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,23 +1,75 @@
 import json
 import os
-from openai import OpenAI
+import threading
+import time
+from ai_cache import make_cache_key, cache_get, cache_set
+from similarity import local_duplicate_score
+from utils import get_local_spam_score
+from metrics import record_openai_call
 
 # Alpha Nex AI Content Analysis Service
 
 # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
 # do not change this unless explicitly requested by the user
+OPENAI_MODEL = "gpt-4o"
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+# Bound each call so a slow API response can only hold a worker (or greenlet/thread) so long
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "20"))
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "1"))
+_openai_client = None
+_openai_client_lock = threading.Lock()
 
-def detect_duplicate_content(file_path, description):
+def get_openai_client():
+    """
+    Build the OpenAI client on first use. Importing the SDK and setting up its
+    HTTP client is deferred so processes that never call the API don't pay for it.
+    Returns None when no API key is configured.
+    """
+    global _openai_client
+    if _openai_client is None and OPENAI_API_KEY:
+        with _openai_client_lock:
+            if _openai_client is None:
+                from openai import OpenAI
+                _openai_client = OpenAI(api_key=OPENAI_API_KEY, timeout=OPENAI_TIMEOUT,
+                                        max_retries=OPENAI_MAX_RETRIES)
+    return _openai_client
+
+def _create_completion(function, **kwargs):
+    """chat.completions.create with latency, token and error metrics for the calling function."""
+    start = time.perf_counter()
+    try:
+        response = get_openai_client().chat.completions.create(model=OPENAI_MODEL, **kwargs)
+    except Exception as e:
+        record_openai_call(function, time.perf_counter() - start, error=e)
+        raise
+    record_openai_call(function, time.perf_counter() - start, usage=getattr(response, 'usage', None))
+    return response
+
+def detect_duplicate_content(file_path, description, raise_errors=False, exclude_upload_id=None,
+                             local_result=None):
     """
     Analyze content for potential duplicates and spam using AI.
     Returns tuple of (duplicate_score, spam_score) both 0.0-1.0
-    Uses GPT-4o for intelligent content analysis.
+    The local near-duplicate index is checked first and, when decisive, sets
+    the duplicate score on its own. The spam score always comes from GPT-4o
+    (or its cache); without an API key it falls back to the keyword check,
+    which callers should not act on alone.
+    With raise_errors=True, API failures propagate so queued jobs can retry.
+    Pass local_result (from local_duplicate_score) when the caller already did
+    the index lookup, e.g. to end its transaction before the API call.
     """
-    if not openai_client:
-        # Return default scores if OpenAI is not available
-        return 0.0, 0.0
+    local_score, decisive = local_result or local_duplicate_score(description, file_path, exclude_upload_id)
+    if not OPENAI_API_KEY:
+        return local_score, get_local_spam_score(description)
+
+    def combine(duplicate_score):
+        # A decisive index match (or clear miss) outranks the model's guess from the description
+        return local_score if decisive else max(duplicate_score, local_score)
+    
+    cache_key = make_cache_key("detect_duplicate_content", OPENAI_MODEL, description)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return combine(cached[0]), cached[1]
     
     try:
         # Create analysis prompt
@@ -40,8 +92,8 @@ def detect_duplicate_content(file_path, description):
         {{"duplicate_score": number, "spam_score": number}}
         """
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
+        response = _create_completion(
+            "detect_duplicate_content",
             messages=[
                 {
                     "role": "system",
@@ -58,21 +110,29 @@ def detect_duplicate_content(file_path, description):
         duplicate_score = max(0.0, min(1.0, result.get("duplicate_score", 0.0)))
         spam_score = max(0.0, min(1.0, result.get("spam_score", 0.0)))
         
-        return duplicate_score, spam_score
+        cache_set(cache_key, "detect_duplicate_content", [duplicate_score, spam_score])
+        return combine(duplicate_score), spam_score
         
     except Exception as e:
         print(f"OpenAI analysis failed: {e}")
+        if raise_errors:
+            raise
         # Return conservative scores on error
-        return 0.2, 0.2
+        return combine(0.2), 0.2
 
 def check_content_quality(content_text):
     """
     Evaluate content quality for review accuracy.
     Returns quality score 0.0-1.0
     """
-    if not openai_client:
+    if not OPENAI_API_KEY:
         return 0.5  # Default neutral score
     
+    cache_key = make_cache_key("check_content_quality", OPENAI_MODEL, content_text)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         prompt = f"""
         Evaluate the quality of this content review:
@@ -89,8 +149,8 @@ def check_content_quality(content_text):
         {{"quality_score": number}}
         """
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
+        response = _create_completion(
+            "check_content_quality",
             messages=[
                 {
                     "role": "system", 
@@ -104,7 +164,9 @@ def check_content_quality(content_text):
         
         content = response.choices[0].message.content
         result = json.loads(content) if content else {}
-        return max(0.0, min(1.0, result.get("quality_score", 0.5)))
+        quality_score = max(0.0, min(1.0, result.get("quality_score", 0.5)))
+        cache_set(cache_key, "check_content_quality", quality_score)
+        return quality_score
         
     except Exception as e:
         print(f"Quality check failed: {e}")
@@ -115,9 +177,14 @@ def analyze_content_description(description, category):
     Analyze if content description matches its category and is appropriate.
     Returns analysis results with suggestions.
     """
-    if not openai_client:
+    if not OPENAI_API_KEY:
         return {"appropriate": True, "confidence": 0.5, "suggestions": []}
     
+    cache_key = make_cache_key("analyze_content_description", OPENAI_MODEL, description, category)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         prompt = f"""
         Analyze this content description and category match:
@@ -140,8 +207,8 @@ def analyze_content_description(description, category):
         }}
         """
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
+        response = _create_completion(
+            "analyze_content_description",
             messages=[
                 {
                     "role": "system",
@@ -154,7 +221,9 @@ def analyze_content_description(description, category):
         )
         
         content = response.choices[0].message.content
-        return json.loads(content) if content else {}
+        analysis = json.loads(content) if content else {}
+        cache_set(cache_key, "analyze_content_description", analysis)
+        return analysis
         
     except Exception as e:
         print(f"Content analysis failed: {e}")
@@ -165,3 +234,163 @@ def analyze_content_description(description, category):
             "issues": [],
             "suggestions": []
         }
+
+# Batched analysis - score many items in one request instead of one call each.
+# Batches are split so each request stays under a rough token budget.
+BATCH_MAX_ITEMS = int(os.environ.get("OPENAI_BATCH_MAX_ITEMS", "20"))
+BATCH_MAX_INPUT_TOKENS = int(os.environ.get("OPENAI_BATCH_MAX_INPUT_TOKENS", "6000"))
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token for English text)."""
+    return len(text or "") // 4 + 1
+
+def split_batches(texts, max_items=None, max_tokens=None):
+    """
+    Split item texts into batches of indexes that fit the item and token budget.
+    An item larger than the budget still gets a batch of its own.
+    """
+    max_items = max_items or BATCH_MAX_ITEMS
+    max_tokens = max_tokens or BATCH_MAX_INPUT_TOKENS
+    batches, current, current_tokens = [], [], 0
+
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+def _run_batch(function, texts, system_prompt, instructions, result_format, tokens_per_item):
+    """
+    Send one batch of numbered items and return {index: result_dict}.
+    Items the model leaves out are simply missing from the returned dict.
+    """
+    numbered = "\n".join(f'{i}. "{text}"' for i, text in enumerate(texts))
+    prompt = f"""
+        {instructions}
+
+        Items:
+        {numbered}
+
+        Respond with JSON containing one result per item, using the item number as "index":
+        {{"results": [{result_format}, ...]}}
+        """
+
+    response = _create_completion(
+        function,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=50 + tokens_per_item * len(texts)
+    )
+
+    content = response.choices[0].message.content
+    result = json.loads(content) if content else {}
+    mapped = {}
+    for item in result.get("results", []):
+        if isinstance(item, dict) and isinstance(item.get("index"), int) and 0 <= item["index"] < len(texts):
+            mapped[item["index"]] = item
+    return mapped
+
+def _score_in_batches(texts, system_prompt, instructions, result_format, tokens_per_item, parse, default,
+                      cache_name, cache_inputs, raise_errors=False):
+    """
+    Run texts through _run_batch in budgeted chunks and map results back in order.
+    Items are looked up in the result cache first under the single-item call's key,
+    so batch and single calls share cached scores.
+    Items without a usable result get default(). With raise_errors=True a failed
+    request raises instead, and items that were left out, unparseable or not
+    scored at all (no API key) come back as None, so callers can skip them.
+    """
+    results = [None] * len(texts)
+    if not OPENAI_API_KEY:
+        return results if raise_errors else [default() for _ in texts]
+
+    cache_keys = [make_cache_key(cache_name, OPENAI_MODEL, *inputs) for inputs in cache_inputs]
+    pending = []
+    for index, cache_key in enumerate(cache_keys):
+        cached = cache_get(cache_key)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.append(index)
+
+    for batch in split_batches([texts[i] for i in pending]):
+        batch = [pending[i] for i in batch]
+        try:
+            mapped = _run_batch(f"{cache_name}_batch", [texts[i] for i in batch], system_prompt, instructions,
+                                result_format, tokens_per_item)
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Batch analysis failed: {e}")
+            for index in batch:
+                results[index] = default(failed=True)
+            continue
+
+        for position, index in enumerate(batch):
+            if position in mapped:
+                try:
+                    results[index] = parse(mapped[position])
+                    cache_set(cache_keys[index], cache_name, results[index])
+                except (TypeError, ValueError, AttributeError) as e:
+                    # e.g. "quality_score": null - treat like an item the model left out
+                    print(f"Unusable batch result for item {index}: {e}")
+            if results[index] is None and not raise_errors:
+                results[index] = default()
+
+    return results
+
+def detect_duplicate_content_batch(descriptions, raise_errors=False):
+    """
+    Batch version of detect_duplicate_content.
+    Returns a list of (duplicate_score, spam_score) tuples in input order
+    (None for unscored items with raise_errors=True, see _score_in_batches).
+    """
+    def parse(item):
+        return [max(0.0, min(1.0, item.get("duplicate_score", 0.0))),
+                max(0.0, min(1.0, item.get("spam_score", 0.0)))]
+
+    def default(failed=False):
+        # Same conservative fallback as the single-item call
+        return [0.2, 0.2] if failed else [0.0, 0.0]
+
+    scores = _score_in_batches(
+        descriptions,
+        "You are a content quality analyzer. Evaluate content descriptions for duplicate/spam likelihood and return scores between 0.0 (clean) and 1.0 (problematic).",
+        "Evaluate each content description for duplicate/repetitive content likelihood (0.0-1.0) "
+        "and spam/low-quality content likelihood (0.0-1.0). Consider generic or template-like "
+        "descriptions, excessive promotional language, lack of specific details and common spam patterns.",
+        '{"index": number, "duplicate_score": number, "spam_score": number}',
+        30, parse, default,
+        "detect_duplicate_content", [(description,) for description in descriptions], raise_errors
+    )
+    return [tuple(score) if score is not None else None for score in scores]
+
+def check_content_quality_batch(reviews, raise_errors=False):
+    """
+    Batch version of check_content_quality.
+    Returns a list of quality scores 0.0-1.0 in input order.
+    """
+    def parse(item):
+        return max(0.0, min(1.0, item.get("quality_score", 0.5)))
+
+    def default(failed=False):
+        return 0.5
+
+    return _score_in_batches(
+        reviews,
+        "You are a review quality evaluator. Score reviews based on their constructiveness and specificity.",
+        "Evaluate the quality of each content review from 0.0 (poor) to 1.0 (excellent). Consider "
+        "constructiveness, specific details vs generic comments, tone and evidence of actual content evaluation.",
+        '{"index": number, "quality_score": number}',
+        20, parse, default,
+        "check_content_quality", [(review,) for review in reviews], raise_errors
+    )
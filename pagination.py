@@ -0,0 +1,67 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+# Alpha Nex Keyset Pagination Helpers
+
+def encode_cursor(created_at, row_id):
+    """Encode a (created_at, id) position as an opaque URL-safe cursor."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Decode a cursor back to (created_at, id). Returns None if invalid."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def keyset_page(query, created_col, id_col, page_size, after=None, before=None):
+    """
+    Fetch one page of a newest-first listing using (created_at, id) keyset pagination.
+    `after` walks towards older rows, `before` walks back towards newer rows.
+    Returns tuple of (rows, next_cursor, prev_cursor).
+    """
+    position = decode_cursor(before) or decode_cursor(after)
+    backwards = position is not None and decode_cursor(before) is not None
+
+    if position:
+        created_at, row_id = position
+        if backwards:
+            query = query.filter(or_(created_col > created_at,
+                                     and_(created_col == created_at, id_col > row_id)))
+        else:
+            query = query.filter(or_(created_col < created_at,
+                                     and_(created_col == created_at, id_col < row_id)))
+
+    if backwards:
+        query = query.order_by(created_col.asc(), id_col.asc())
+    else:
+        query = query.order_by(created_col.desc(), id_col.desc())
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    first, last = rows[0], rows[-1]
+    first_cursor = encode_cursor(first.created_at, first.id)
+    last_cursor = encode_cursor(last.created_at, last.id)
+
+    if backwards:
+        next_cursor = last_cursor
+        prev_cursor = first_cursor if has_more else None
+    else:
+        next_cursor = last_cursor if has_more else None
+        prev_cursor = first_cursor if position else None
+
+    return rows, next_cursor, prev_cursor
@@ -0,0 +1,167 @@
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from utils import get_file_category
+from blob_store import find_blob_by_path
+
+# Alpha Nex Upload Previews
+# Reviewer-sized derivatives are rendered off-request by the job worker and
+# cached on disk by content hash, so identical files share one set of previews
+# and a preview never has to be invalidated. Image decoding runs in a process
+# pool: it is CPU-bound, and a pathological image can only take down a child.
+# A render that times out, or a child that dies, gets the pool killed and replaced.
+
+PREVIEW_PROCESSES = int(os.environ.get("PREVIEW_PROCESSES", "2"))
+PREVIEW_TIMEOUT = int(os.environ.get("PREVIEW_TIMEOUT", "60"))
+
+# variant -> (max width/height, file extension, Pillow format, save options)
+IMAGE_VARIANTS = {
+    'thumb': (320, 'jpg', 'JPEG', {'quality': 80, 'optimize': True}),
+    'preview': (1280, 'webp', 'WEBP', {'quality': 80, 'method': 4}),
+}
+POSTER_WIDTH = 640
+# Formats Pillow can decode; raw camera files, PSD layers and vector formats are skipped
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'tif', 'webp', 'ico'}
+PREVIEW_VARIANTS = list(IMAGE_VARIANTS) + ['poster']
+
+_pool = None
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PREVIEW_PROCESSES)
+    return _pool
+
+def _recycle_pool():
+    """
+    Kill the pool's processes and drop it, so the next render gets fresh ones.
+    A render that overran PREVIEW_TIMEOUT would otherwise keep running and hold
+    a slot; futures have no way to stop a task that has started.
+    """
+    global _pool
+    pool, _pool = _pool, None
+    if pool is None:
+        return
+    if hasattr(pool, 'kill_workers'):
+        pool.kill_workers()  # Python 3.14+
+    else:
+        for process in list(pool._processes.values()):
+            process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def get_preview_folder():
+    return current_app.config.get("PREVIEW_FOLDER") or os.path.join(current_app.config["UPLOAD_FOLDER"], "previews")
+
+def get_preview_path(digest, variant, folder=None):
+    """On-disk location of a derivative: <folder>/<ab>/<digest>_<variant>.<ext>"""
+    extension = IMAGE_VARIANTS[variant][1] if variant in IMAGE_VARIANTS else 'jpg'
+    return os.path.join(folder or get_preview_folder(), digest[:2], f"{digest}_{variant}.{extension}")
+
+def find_preview(digest, variant):
+    """Path of an already rendered derivative, or None."""
+    path = get_preview_path(digest, variant)
+    return path if os.path.exists(path) else None
+
+def _save_atomically(save, dest):
+    # Readers only ever see complete files; concurrent renders of the same hash just race on the rename
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp_path = f"{dest}.{os.getpid()}.tmp"
+    try:
+        save(tmp_path)
+        os.replace(tmp_path, dest)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def render_image_variants(source, targets):
+    """
+    Runs in a pool process. targets maps variant -> destination path.
+    Decodes the source once, at reduced size where the codec allows it.
+    """
+    from PIL import Image, ImageOps
+
+    largest = max(IMAGE_VARIANTS[variant][0] for variant in targets)
+    with Image.open(source) as img:
+        # JPEG can decode straight to a power-of-two smaller scale, skipping most of the work
+        img.draft('RGB', (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+
+        for variant, dest in sorted(targets.items(), key=lambda item: -IMAGE_VARIANTS[item[0]][0]):
+            size, _, image_format, options = IMAGE_VARIANTS[variant]
+            img.thumbnail((size, size), Image.LANCZOS)  # Each smaller variant resizes from the previous one
+            _save_atomically(lambda path: img.save(path, image_format, **options), dest)
+    return sorted(targets)
+
+def render_video_poster(source, dest):
+    """Grab one early frame with ffmpeg, if it is installed. Returns True on success."""
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return False
+
+    def grab(path):
+        subprocess.run([ffmpeg, '-v', 'error', '-ss', '1', '-i', source, '-frames:v', '1',
+                        '-vf', f'scale={POSTER_WIDTH}:-2', '-f', 'image2', '-y', path],
+                       check=True, timeout=PREVIEW_TIMEOUT, stdin=subprocess.DEVNULL)
+
+    try:
+        _save_atomically(grab, dest)
+    except (subprocess.SubprocessError, OSError) as e:
+        print(f"Poster frame failed for {source}: {e}")
+        return False
+    return os.path.exists(dest)
+
+def preview_variant_for(filename):
+    """Variant to show as a reviewer thumbnail for a file name ('thumb', 'poster'), or None."""
+    extension = filename.rsplit('.', 1)[-1].lower() if filename and '.' in filename else ''
+    category = get_file_category(filename)
+    if category == 'image' and extension in IMAGE_EXTENSIONS:
+        return 'thumb'
+    if category == 'video':
+        return 'poster'
+    return None
+
+def generate_previews(file_path, filename, digest):
+    """
+    Render missing derivatives for one stored file. Returns the variants now on disk.
+    Image work goes to the process pool; video posters run ffmpeg as a subprocess.
+    """
+    variant = preview_variant_for(filename)
+
+    if variant == 'thumb':
+        missing = {variant: get_preview_path(digest, variant) for variant in IMAGE_VARIANTS
+                   if not find_preview(digest, variant)}
+        if missing:
+            future = _get_pool().submit(render_image_variants, file_path, missing)
+            try:
+                future.result(timeout=PREVIEW_TIMEOUT)
+            except (TimeoutError, BrokenProcessPool):
+                # A hung render keeps its process busy, and a crashed one breaks the pool for good
+                _recycle_pool()
+                raise
+        return sorted(IMAGE_VARIANTS)
+
+    if variant == 'poster':
+        if find_preview(digest, 'poster') or render_video_poster(file_path, get_preview_path(digest, 'poster')):
+            return ['poster']
+
+    return []
+
+def get_upload_preview(file_path, variant):
+    """
+    Derivative path for a stored upload, looked up by its content hash in the
+    blob registry. Uploads that predate the registry have no previews.
+    """
+    blob = find_blob_by_path(file_path)
+    return find_preview(blob.digest, variant) if blob else None
+
+def get_upload_preview_paths(file_path):
+    """Every rendered derivative of a stored upload, e.g. to delete them with its last reference."""
+    blob = find_blob_by_path(file_path)
+    if not blob:
+        return []
+    return [path for path in (find_preview(blob.digest, variant) for variant in PREVIEW_VARIANTS) if path]
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from datetime import datetime, time as dt_time
+from sqlalchemy import and_, case, func, or_, select, update
+from app import db
+
+# Alpha Nex Daily Quotas
+# The daily_* counters on User are bucketed by UTC day: a counter whose reset
+# stamp is before today's midnight reads as zero, and the first write of the
+# day resets it inside the same UPDATE, so no scheduled reset job is needed.
+# Each check-and-increment is one conditional UPDATE, which stays correct with
+# several workers because the database serialises the row update.
+
+DAILY_UPLOAD_LIMIT = 3
+DAILY_UPLOAD_BYTES = 500 * 1024 * 1024
+DAILY_REVIEW_LIMIT = 5
+
+# Optional per-process burst limiter in front of the database (0 disables)
+BURST_CAPACITY = int(os.environ.get("QUOTA_BURST_CAPACITY", "0"))
+BURST_REFILL_PER_SECOND = float(os.environ.get("QUOTA_BURST_PER_MINUTE", "6")) / 60
+
+def day_start(now=None):
+    """UTC midnight that starts the current quota day."""
+    now = now or datetime.utcnow()
+    return datetime.combine(now.date(), dt_time.min)
+
+class TokenBucket:
+    """Thread-safe per-key token bucket. take() is False when the key should be throttled."""
+
+    MAX_KEYS = 10000
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._buckets = {}  # key -> (tokens, last refill time)
+        self._lock = threading.Lock()
+
+    def take(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_per_second)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now)
+            return allowed
+
+    def _prune(self, now):
+        # A bucket that has refilled completely is the same as a missing one
+        for key, (tokens, last) in list(self._buckets.items()):
+            if tokens + (now - last) * self.refill_per_second >= self.capacity:
+                del self._buckets[key]
+
+_burst = TokenBucket(BURST_CAPACITY, BURST_REFILL_PER_SECOND) if BURST_CAPACITY > 0 else None
+
+# (kind, user_id, day) whose count or byte limit is used up for today. Counters
+# only go up within a day, so this process can refuse again without a round
+# trip. A refusal because one file is too big for the bytes left is not cached.
+_exhausted = set()
+_exhausted_lock = threading.Lock()
+
+def _front_allows(kind, user_id, today):
+    with _exhausted_lock:
+        if (kind, user_id, today) in _exhausted:
+            return False
+    return _burst is None or _burst.take((kind, user_id))
+
+def _mark_exhausted(kind, user_id, today):
+    with _exhausted_lock:
+        stale = [key for key in _exhausted if key[2] != today]
+        _exhausted.difference_update(stale)
+        _exhausted.add((kind, user_id, today))
+
+def clear_quota_front():
+    """Forget in-process refusals, e.g. after counters were reset by hand."""
+    with _exhausted_lock:
+        _exhausted.clear()
+
+def consume_upload_quota(user_id, size):
+    """
+    Count one upload of `size` bytes against today's quota in a single
+    conditional UPDATE. Returns False, writing nothing, if it would exceed the
+    count or byte limit. Caller commits, so a failed upload rolls it back too.
+    """
+    from models import User
+
+    today = day_start()
+    if size > DAILY_UPLOAD_BYTES or not _front_allows('upload', user_id, today):
+        return False
+
+    stale = or_(User.daily_upload_reset.is_(None), User.daily_upload_reset < today)
+    count = func.coalesce(User.daily_upload_count, 0)
+    used_bytes = func.coalesce(User.daily_upload_bytes, 0)
+    result = db.session.execute(
+        update(User)
+        .where(User.id == user_id,
+               or_(stale, and_(count < DAILY_UPLOAD_LIMIT, used_bytes + size <= DAILY_UPLOAD_BYTES)))
+        .values(daily_upload_count=case((stale, 1), else_=count + 1),
+                daily_upload_bytes=case((stale, size), else_=used_bytes + size),
+                daily_upload_reset=case((stale, today), else_=User.daily_upload_reset))
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        # A smaller file may still fit, so only remember refusals no upload can pass
+        row = db.session.execute(
+            select(count, used_bytes).where(User.id == user_id, ~stale)
+        ).first()
+        if row and (row[0] >= DAILY_UPLOAD_LIMIT or row[1] >= DAILY_UPLOAD_BYTES):
+            _mark_exhausted('upload', user_id, today)
+        return False
+    return True
+
+def consume_review_quota(user_id):
+    """Count one review against today's quota; same contract as consume_upload_quota."""
+    from models import User
+
+    today = day_start()
+    if not _front_allows('review', user_id, today):
+        return False
+
+    stale = or_(User.daily_review_reset.is_(None), User.daily_review_reset < today)
+    count = func.coalesce(User.daily_review_count, 0)
+    result = db.session.execute(
+        update(User)
+        .where(User.id == user_id, or_(stale, count < DAILY_REVIEW_LIMIT))
+        .values(daily_review_count=case((stale, 1), else_=count + 1),
+                daily_review_reset=case((stale, today), else_=User.daily_review_reset))
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        _mark_exhausted('review', user_id, today)
+        return False
+    return True
+
+def get_quota_usage(user):
+    """Today's usage and remaining allowance from an already-loaded User row - no query."""
+    today = day_start()
+    uploads_current = user.daily_upload_reset is not None and user.daily_upload_reset >= today
+    reviews_current = user.daily_review_reset is not None and user.daily_review_reset >= today
+    upload_count = (user.daily_upload_count or 0) if uploads_current else 0
+    upload_bytes = (user.daily_upload_bytes or 0) if uploads_current else 0
+    review_count = (user.daily_review_count or 0) if reviews_current else 0
+    return {
+        'upload_count': upload_count,
+        'upload_bytes': upload_bytes,
+        'review_count': review_count,
+        'remaining_uploads': max(0, DAILY_UPLOAD_LIMIT - upload_count),
+        'remaining_bytes': max(0, DAILY_UPLOAD_BYTES - upload_bytes),
+        'remaining_reviews': max(0, DAILY_REVIEW_LIMIT - review_count),
+    }
+
+def can_upload_today(user, size=0):
+    """Pre-check for forms and streaming uploads; consume_upload_quota is authoritative."""
+    usage = get_quota_usage(user)
+    return usage['remaining_uploads'] > 0 and size <= usage['remaining_bytes']
+
+def can_review_today(user):
+    return get_quota_usage(user)['remaining_reviews'] > 0
@@ -0,0 +1,174 @@
+import os
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, or_, select
+from app import app, db
+from blob_store import release_blob
+from job_queue import enqueue_job, job_handler, prune_finished_jobs
+from previews import get_upload_preview_paths
+from review_queue import rebuild_tally
+from upload_events import prune_status_events
+from user_stats import invalidate_user_stats
+
+# Alpha Nex Demo Data Retention
+# Demo users who have been inactive for DEMO_RETENTION_DAYS are deleted together
+# with their uploads, reviews and other rows. Each batch of users is deleted in
+# its own short transaction, children before parents (reviews, uploads and their
+# index rows, then strikes/withdrawals/ratings/admin actions, then users), so
+# there is no long lock. Stored files are removed only after the batch commits.
+# Every committed batch is final, so a run can stop at any point and the next
+# run picks up the remaining users.
+#
+# Activity is read from columns the app already maintains: created_at and the
+# daily quota reset stamps, which move forward on the first upload/review of each
+# day. A user is stale when all of them are older than the cutoff.
+
+DEMO_USERNAME_PREFIX = 'demo_user_'
+
+def _stale_demo_users(cutoff, after_id, limit):
+    from models import User
+
+    def before_cutoff(column):
+        return or_(column.is_(None), column < cutoff)
+
+    return db.session.execute(
+        select(User.id)
+        .where(User.username.startswith(DEMO_USERNAME_PREFIX, autoescape=True),
+               User.id > after_id,
+               before_cutoff(User.created_at),
+               before_cutoff(User.daily_upload_reset),
+               before_cutoff(User.daily_review_reset))
+        .order_by(User.id).limit(limit)
+    ).scalars().all()
+
+def delete_demo_users(user_ids):
+    """
+    Delete users and everything that references them. Caller commits.
+    Returns the stored files (uploads whose last reference went, plus their
+    previews) to remove once the commit has succeeded.
+    """
+    from models import (User, Upload, Review, Strike, WithdrawalRequest, AdminAction, Rating,
+                        ReviewTally, SimilarityBucket, SimilaritySignature, UploadStatusEvent, UserStatsCache)
+
+    uploads = db.session.execute(select(Upload.id, Upload.file_path).where(Upload.user_id.in_(user_ids))).all()
+    upload_ids = [upload.id for upload in uploads]
+
+    # Other users who reviewed these uploads lose those reviews from their stats
+    other_reviewers = db.session.execute(
+        select(Review.reviewer_id).distinct()
+        .where(Review.upload_id.in_(upload_ids), Review.reviewer_id.notin_(user_ids))
+    ).scalars().all() if upload_ids else []
+    # Uploads that survive but lose reviews written by these users
+    reviewed_uploads = db.session.execute(
+        select(Review.upload_id).distinct()
+        .where(Review.reviewer_id.in_(user_ids), Review.upload_id.notin_(upload_ids))
+    ).scalars().all()
+
+    files = []
+    for upload in uploads:
+        preview_paths = get_upload_preview_paths(upload.file_path)
+        if release_blob(upload.file_path):
+            files.extend([upload.file_path] + preview_paths)
+
+    statements = [
+        delete(Review).where(or_(Review.reviewer_id.in_(user_ids), Review.upload_id.in_(upload_ids))),
+        delete(SimilarityBucket).where(SimilarityBucket.upload_id.in_(upload_ids)),
+        delete(SimilaritySignature).where(SimilaritySignature.upload_id.in_(upload_ids)),
+        delete(ReviewTally).where(ReviewTally.upload_id.in_(upload_ids)),
+        delete(UploadStatusEvent).where(UploadStatusEvent.user_id.in_(user_ids)),
+        delete(Upload).where(Upload.id.in_(upload_ids)),
+        delete(Strike).where(Strike.user_id.in_(user_ids)),
+        delete(WithdrawalRequest).where(WithdrawalRequest.user_id.in_(user_ids)),
+        delete(Rating).where(Rating.user_id.in_(user_ids)),
+        delete(AdminAction).where(AdminAction.admin_id.in_(user_ids)),
+        delete(UserStatsCache).where(UserStatsCache.user_id.in_(user_ids)),
+        delete(User).where(User.id.in_(user_ids)),
+    ]
+    for statement in statements:
+        db.session.execute(statement.execution_options(synchronize_session=False))
+    for upload_id in reviewed_uploads:
+        rebuild_tally(upload_id)
+    invalidate_user_stats(*other_reviewers)
+    return files
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            current_app.logger.error(f"Failed to delete file {path}: {e}")
+
+def purge_stale_demo_users(max_batches=None):
+    """
+    Delete inactive demo users in batches of RETENTION_BATCH_SIZE, one commit per
+    batch, sleeping RETENTION_BATCH_PAUSE between batches. Stops after max_batches
+    (None for no limit). Returns (users_deleted, more_remaining).
+    """
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config['DEMO_RETENTION_DAYS'])
+    batch_size = current_app.config['RETENTION_BATCH_SIZE']
+    deleted = batches = 0
+    last_id = 0
+
+    while True:
+        user_ids = _stale_demo_users(cutoff, last_id, batch_size)
+        if not user_ids:
+            return deleted, False
+        if max_batches is not None and batches >= max_batches:
+            db.session.rollback()
+            return deleted, True
+
+        try:
+            files = delete_demo_users(user_ids)
+            db.session.commit()
+        except Exception as e:
+            # Skip past this batch so one bad row cannot stall every later run
+            db.session.rollback()
+            current_app.logger.error(f"Retention batch {user_ids[0]}-{user_ids[-1]} failed: {e}")
+            files = []
+        else:
+            deleted += len(user_ids)
+        last_id = user_ids[-1]
+        batches += 1
+
+        _remove_files(files)
+        time.sleep(current_app.config['RETENTION_BATCH_PAUSE'])
+
+def schedule_retention(delay_seconds=0):
+    """Queue a retention run unless one is already waiting. Commits."""
+    from models import AnalysisJob
+
+    pending = db.session.execute(
+        select(AnalysisJob.id).where(AnalysisJob.job_type == 'purge_stale_demo_users',
+                                     AnalysisJob.status.in_(['queued', 'running'])).limit(1)
+    ).scalar()
+    if pending is None:
+        job = enqueue_job('purge_stale_demo_users', {})
+        job.run_after = datetime.utcnow() + timedelta(seconds=delay_seconds)
+        db.session.commit()
+
+@job_handler('purge_stale_demo_users')
+def purge_stale_demo_users_job(payload):
+    """
+    A bounded slice of retention work, plus pruning of old status events and
+    finished jobs. Requeues itself: right away while stale users remain,
+    otherwise after RETENTION_INTERVAL.
+    """
+    deleted, more = purge_stale_demo_users(current_app.config['RETENTION_MAX_BATCHES'])
+    prune_status_events()
+    prune_finished_jobs()
+    current_app.logger.info(f"Retention removed {deleted} demo users")
+
+    job = enqueue_job('purge_stale_demo_users', {})
+    if not more:
+        job.run_after = datetime.utcnow() + timedelta(seconds=current_app.config['RETENTION_INTERVAL'])
+    db.session.commit()
+
+@app.cli.command("demo-purge")
+def demo_purge_command():
+    """Delete demo users inactive for DEMO_RETENTION_DAYS, with their data and files. Safe to interrupt."""
+    deleted, _ = purge_stale_demo_users()
+    removed_events = prune_status_events()
+    removed_jobs = prune_finished_jobs()
+    print(f"Removed {deleted} demo users, {removed_events} old status events and {removed_jobs} finished jobs")
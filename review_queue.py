@@ -0,0 +1,137 @@
+from flask import current_app
+from sqlalchemy import case, exists, func, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import ReviewTally
+from utils import calculate_xp_reward
+from upload_events import record_status_event
+
+# Alpha Nex Review Queue
+# Review counts live in ReviewTally so the reviewer queue is one indexed query
+# instead of a count per upload.
+
+MAX_REVIEWS_PER_UPLOAD = 5
+MAJORITY_VOTES = 3
+
+def create_tally(upload_id):
+    """Add an empty tally for a new upload. Caller commits."""
+    tally = ReviewTally()
+    tally.upload_id = upload_id
+    tally.review_count = 0
+    tally.good_count = 0
+    tally.bad_count = 0
+    db.session.add(tally)
+
+def record_review(upload_id, rating):
+    """
+    Count one review against an upload with an atomic UPDATE. Call after adding
+    the Review to the session; the caller commits, so the counters change in the
+    same transaction as the review row. Returns the updated (review_count,
+    good_count, bad_count) row.
+    """
+    values = {'review_count': ReviewTally.review_count + 1}
+    if rating == 'good':
+        values['good_count'] = ReviewTally.good_count + 1
+    elif rating == 'bad':
+        values['bad_count'] = ReviewTally.bad_count + 1
+
+    result = db.session.execute(
+        update(ReviewTally).where(ReviewTally.upload_id == upload_id).values(**values)
+    )
+    if not result.rowcount:
+        # Upload predates tallies - count its reviews (including this one) from scratch
+        db.session.flush()
+        rebuild_tally(upload_id)
+
+    return get_tally_counts(upload_id)
+
+def get_tally_counts(upload_id):
+    """Read (review_count, good_count, bad_count) for an upload in one query."""
+    return db.session.execute(
+        select(ReviewTally.review_count, ReviewTally.good_count, ReviewTally.bad_count)
+        .where(ReviewTally.upload_id == upload_id)
+    ).one()
+
+def get_review_count(upload_id):
+    """Number of reviews an upload has received."""
+    count = db.session.query(ReviewTally.review_count).filter_by(upload_id=upload_id).scalar()
+    if count is None:
+        from models import Review
+        count = Review.query.filter_by(upload_id=upload_id).count()
+    return count
+
+def rebuild_tally(upload_id):
+    """Recompute an upload's tally from its Review rows. Caller commits."""
+    from models import Review
+
+    counts = dict(db.session.query(Review.rating, func.count(Review.id))
+                  .filter(Review.upload_id == upload_id)
+                  .group_by(Review.rating).all())
+    tally = db.session.get(ReviewTally, upload_id)
+    if not tally:
+        tally = ReviewTally()
+        tally.upload_id = upload_id
+        try:
+            with db.session.begin_nested():
+                db.session.add(tally)
+        except IntegrityError:
+            # Another worker created it first
+            tally = db.session.get(ReviewTally, upload_id)
+
+    tally.good_count = counts.get('good', 0)
+    tally.bad_count = counts.get('bad', 0)
+    tally.review_count = sum(counts.values())
+    db.session.flush()
+    return tally
+
+def delete_tally(upload_id):
+    """Remove the tally of a deleted upload. Caller commits."""
+    ReviewTally.query.filter_by(upload_id=upload_id).delete()
+
+def get_open_uploads(reviewer_id, limit=None):
+    """
+    Uploads this reviewer may still review, newest first: not their own,
+    not already reviewed by them (anti-join) and under the review cap.
+    """
+    from models import Upload, Review
+
+    limit = limit or current_app.config['REVIEW_QUEUE_PAGE_SIZE']
+    already_reviewed = exists().where(Review.upload_id == Upload.id, Review.reviewer_id == reviewer_id)
+
+    return Upload.query.outerjoin(ReviewTally, ReviewTally.upload_id == Upload.id).filter(
+        Upload.user_id != reviewer_id,
+        func.coalesce(ReviewTally.review_count, 0) < MAX_REVIEWS_PER_UPLOAD,
+        ~already_reviewed
+    ).order_by(Upload.uploaded_at.desc()).limit(limit).all()
+
+def finalize_upload(upload_id, uploader_id, counts):
+    """
+    Apply the majority decision once an upload has all its reviews.
+    Status and uploader XP change through conditional/atomic UPDATEs, so only
+    one concurrent reviewer finalises and no XP update is lost. Caller commits.
+    Returns 'approved', 'rejected', 'pending', or None if reviews are still open.
+    """
+    from models import Upload, User
+
+    if counts.review_count < MAX_REVIEWS_PER_UPLOAD:
+        return None
+
+    if counts.good_count >= MAJORITY_VOTES:
+        decision = 'approved'
+        xp_points = User.xp_points + calculate_xp_reward('upload_approved')
+    elif counts.bad_count >= MAJORITY_VOTES:
+        decision = 'rejected'
+        penalty = calculate_xp_reward('upload')  # Same amount as upload reward
+        xp_points = case((User.xp_points > penalty, User.xp_points - penalty), else_=0)  # Don't go below 0
+    else:
+        return 'pending'  # Still needs more reviews
+
+    result = db.session.execute(
+        update(Upload)
+        .where(Upload.id == upload_id, Upload.status.notin_(['approved', 'rejected']))
+        .values(status=decision)
+    )
+    if result.rowcount:
+        db.session.execute(update(User).where(User.id == uploader_id).values(xp_points=xp_points))
+        record_status_event(upload_id, uploader_id, decision)
+    return decision
@@ -1,11 +1,69 @@
-from flask import render_template, request, redirect, url_for, flash
+from flask import render_template, request, redirect, url_for, flash, jsonify
+from sqlalchemy import text
 from app import app, db
 from models import Content
+from pagination import keyset_page
+from db_config import get_pool_stats
+from search import SEARCH_MAX_PAGE, SEARCH_MAX_PAGE_SIZE, SEARCH_PAGE_SIZE, search_contents
+
+def get_content_page():
+    """Load one keyset-paginated page of the content feed from request args."""
+    page_size = request.args.get('limit', app.config['CONTENT_PAGE_SIZE'], type=int)
+    page_size = max(1, min(page_size, app.config['CONTENT_PAGE_SIZE_MAX']))
+
+    return keyset_page(Content.query, Content.created_at, Content.id, page_size,
+                       after=request.args.get('after'),
+                       before=request.args.get('before'))
 
 @app.route('/')
 def index():
-    contents = Content.query.order_by(Content.created_at.desc()).all()
-    return render_template('index.html', contents=contents)
+    contents, next_cursor, prev_cursor = get_content_page()
+    return render_template('index.html', contents=contents,
+                           next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+@app.route('/api/contents')
+def api_contents():
+    """JSON variant of the content feed"""
+    contents, next_cursor, prev_cursor = get_content_page()
+    return jsonify({
+        'contents': [content.to_dict() for content in contents],
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor
+    })
+
+def get_search_page():
+    """Run the ranked content search described by request args, with page and limit clamped."""
+    query = request.args.get('q', '').strip()
+    page = max(1, min(request.args.get('page', 1, type=int), SEARCH_MAX_PAGE))
+    limit = request.args.get('limit', SEARCH_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+    if not query:
+        return query, page, limit, [], False
+    try:
+        results, has_more = search_contents(query, page, limit)
+    except Exception as e:
+        # Most likely the search migration has not been applied yet
+        app.logger.error(f"Search failed: {e}")
+        results, has_more = [], False
+    return query, page, limit, results, has_more
+
+@app.route('/search')
+def search_page():
+    query, page, limit, results, has_more = get_search_page()
+    return render_template('search.html', query=query, page=page, limit=limit, results=results,
+                           has_more=has_more)
+
+@app.route('/api/search')
+def api_search():
+    """JSON variant of the content search; highlighted fields are HTML with <mark> tags"""
+    query, page, limit, results, has_more = get_search_page()
+    return jsonify({
+        'query': query,
+        'page': page,
+        'limit': limit,
+        'results': results,
+        'has_more': has_more
+    })
 
 @app.route('/add', methods=['GET', 'POST'])
 def add_content():
@@ -28,4 +86,16 @@ def add_content():
 @app.route('/view/<int:id>')
 def view_content(id):
     content = Content.query.get_or_404(id)
-    return render_template('view.html', content=content)
\ No newline at end of file
+    return render_template('view.html', content=content)
+
+@app.route('/health/db')
+def health_db():
+    """Database connectivity and connection pool usage for sizing workers"""
+    try:
+        db.session.execute(text('SELECT 1'))
+        status = 'ok'
+    except Exception as e:
+        app.logger.error(f"Database health check failed: {e}")
+        status = 'error'
+    
+    return jsonify({'status': status, 'pool': get_pool_stats(db.engine)}), 200 if status == 'ok' else 503
@@ -1,270 +1,65 @@
 import os
 import uuid
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
-from flask import render_template, request, redirect, url_for, flash, jsonify, current_app, session
-from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from flask import render_template, request, redirect, url_for, flash, jsonify, current_app, session, Response, stream_with_context, abort, g
 from app import app, db
 from models import User, Upload, Review, Strike, WithdrawalRequest, AdminAction, Rating
-from forms import SignupForm, LoginForm, UploadForm, ReviewForm, WithdrawalForm, RatingForm
-from utils import allowed_file, get_file_size, calculate_xp_reward
+from forms import UploadForm, ReviewForm, RatingForm
+from utils import allowed_file, calculate_xp_reward
 from utils_motivation import get_upload_success_message, get_review_success_message, get_xp_milestone_message, get_welcome_back_message, get_daily_limit_reminder
-from openai_service import detect_duplicate_content, check_content_quality
+from openai_service import check_content_quality
+from job_queue import enqueue_job
+from similarity import remove_upload
+from blob_store import find_blob_by_path, claim_blob, release_blob
+from ingest import store_upload, too_large_message, UploadRejected
+from review_queue import MAX_REVIEWS_PER_UPLOAD, create_tally, record_review, get_review_count, delete_tally, get_open_uploads, finalize_upload
+from user_stats import get_user_stats, invalidate_user_stats
+from quota import can_upload_today, can_review_today, get_quota_usage, consume_upload_quota, consume_review_quota
+from upload_events import stream_status_events
+from previews import PREVIEW_VARIANTS, get_upload_preview, get_upload_preview_paths, preview_variant_for
+from file_serving import send_stored_file, is_inline_media
+from storage import get_storage
+from search import search_uploads
+from demo import get_demo_user, materialize_demo_user, is_demo_fixture
 
-def create_test_files(test_user):
-    """Create test files for review demonstration"""
-    test_files = [
-        {
-            'filename': 'sample_video_tutorial.mp4',
-            'original_filename': 'Python Programming Tutorial - Basics.mp4',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - A comprehensive tutorial covering Python programming fundamentals including variables, loops, and functions.',
-            'category': 'video',
-            'file_size': 15728640  # 15MB
-        },
-        {
-            'filename': 'machine_learning_paper.pdf',
-            'original_filename': 'Deep Learning in Computer Vision - Research Paper.pdf',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Academic research paper discussing the latest advances in deep learning techniques for computer vision applications.',
-            'category': 'document',
-            'file_size': 2097152  # 2MB
-        },
-        {
-            'filename': 'javascript_project.zip',
-            'original_filename': 'React E-commerce Project.zip',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Complete React.js e-commerce website project with shopping cart, user authentication, and payment integration.',
-            'category': 'code',
-            'file_size': 5242880  # 5MB
-        },
-        {
-            'filename': 'nature_sounds.mp3',
-            'original_filename': 'Relaxing Forest Sounds - 1 Hour.mp3',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - High-quality audio recording of peaceful forest sounds including birds chirping and gentle wind through trees.',
-            'category': 'audio',
-            'file_size': 8388608  # 8MB
-        },
-        {
-            'filename': 'website_design.png',
-            'original_filename': 'Modern UI Design Mockup.png',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Professional website design mockup showcasing modern UI/UX principles with clean layouts and responsive design.',
-            'category': 'image',
-            'file_size': 1048576  # 1MB
-        },
-        {
-            'filename': 'react_masterclass.mp4',
-            'original_filename': 'React.js Advanced Concepts.mp4',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - In-depth React.js tutorial covering hooks, context API, performance optimization, and advanced state management patterns.',
-            'category': 'video',
-            'file_size': 42000000  # 42MB
-        },
-        {
-            'filename': 'cybersecurity_podcast.wav',
-            'original_filename': 'Cybersecurity Weekly Episode 15.wav',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Latest cybersecurity trends discussion including zero-trust architecture, endpoint security, and threat intelligence.',
-            'category': 'audio',
-            'file_size': 28800000  # 28.8MB
-        },
-        {
-            'filename': 'api_documentation.pdf',
-            'original_filename': 'RESTful API Design Guide.pdf',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Comprehensive guide to designing scalable REST APIs with best practices, authentication methods, and documentation standards.',
-            'category': 'document',
-            'file_size': 3072000  # 3MB
-        },
-        {
-            'filename': 'algorithm_implementation.py',
-            'original_filename': 'data_structures_algorithms.py',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Python implementation of essential data structures and algorithms including binary trees, graphs, and dynamic programming.',
-            'category': 'code',
-            'file_size': 256000  # 256KB
-        },
-        {
-            'filename': 'database_schema.png',
-            'original_filename': 'E-commerce Database Design.png',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Detailed database schema diagram for a scalable e-commerce platform with proper normalization and indexing strategies.',
-            'category': 'image',
-            'file_size': 1536000  # 1.5MB
-        },
-        {
-            'filename': 'devops_tutorial.avi',
-            'original_filename': 'Docker & Kubernetes Tutorial.avi',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Complete DevOps tutorial covering containerization with Docker, orchestration with Kubernetes, and CI/CD pipeline setup.',
-            'category': 'video',
-            'file_size': 38400000  # 38.4MB
-        },
-        {
-            'filename': 'tech_interview.m4a',
-            'original_filename': 'Software Engineering Interview Prep.m4a',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Mock technical interview session covering system design, coding challenges, and behavioral questions for senior developers.',
-            'category': 'audio',
-            'file_size': 22528000  # 22.5MB
-        },
-        {
-            'filename': 'ml_research_notes.txt',
-            'original_filename': 'Machine Learning Research Notes.txt',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Detailed notes on latest machine learning research including transformer architectures, attention mechanisms, and neural networks.',
-            'category': 'document',
-            'file_size': 512000  # 512KB
-        },
-        {
-            'filename': 'web_performance.js',
-            'original_filename': 'performance_optimization_utils.js',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - JavaScript utilities for web performance optimization including lazy loading, code splitting, and cache management.',
-            'category': 'code',
-            'file_size': 307200  # 300KB
-        },
-        {
-            'filename': 'system_architecture.svg',
-            'original_filename': 'Microservices Architecture Diagram.svg',
-            'description': '**DEMO FILE FOR TESTING PURPOSES ONLY** - Scalable microservices architecture diagram showing service communication, load balancing, and database distribution.',
-            'category': 'image',
-            'file_size': 204800  # 200KB
-        }
-    ]
-    
-    for test_file in test_files:
-        # Create unique filename for this test user to avoid conflicts
-        unique_filename = f"{test_user.id}_{test_file['filename']}"
-        # Check if this test file already exists for this specific test user
-        existing = Upload.query.filter_by(filename=unique_filename, user_id=test_user.id).first()
-        if not existing:
-            upload = Upload()
-            upload.user_id = test_user.id
-            upload.filename = unique_filename
-            upload.original_filename = test_file['original_filename']
-            upload.file_path = f"uploads/test_{unique_filename}"
-            upload.file_size = test_file['file_size']
-            upload.description = test_file['description']
-            upload.category = test_file['category']
-            upload.status = 'pending'
-            upload.ai_consent = True
-            
-            db.session.add(upload)
-    
-    db.session.commit()
-
-@app.route('/', methods=['GET', 'POST'])
-def index():
-    """Landing page redirects directly to dashboard"""
-    return redirect(url_for('dashboard'))
+# Reviewer cards pick their thumbnail by file type, the same check generate_previews uses
+app.add_template_global(preview_variant_for, 'preview_variant')
 
-def reset_all_demo_data():
-    """Clear all existing data for completely fresh experience"""
-    try:
-        # Delete all data for fresh start (order matters for foreign keys)
-        Review.query.delete()
-        Upload.query.delete() 
-        Strike.query.delete()
-        WithdrawalRequest.query.delete()
-        AdminAction.query.delete()
-        Rating.query.delete()
-        User.query.delete()
-        
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error resetting demo data: {e}")
-
-def ensure_demo_users():
-    """Ensure demo users exist and return demo user"""
-    try:
-        # Check if demo user already exists in session
-        demo_user_id = session.get('demo_user_id')
-        if demo_user_id:
-            demo_user = User.query.get(demo_user_id)
-            if demo_user:
-                return demo_user
-        
-        # Create new demo user
-        random_id = str(uuid.uuid4())[:8]
-        demo_user = User()
-        demo_user.username = f'demo_user_{random_id}'
-        demo_user.name = 'Demo User'
-        demo_user.email = f'demo_{random_id}@alphanex.com'
-        demo_user.password_hash = generate_password_hash('demo123')
-        demo_user.xp_points = 500
-        demo_user.daily_upload_count = 0
-        demo_user.daily_upload_bytes = 0
-        demo_user.daily_review_count = 0
-        demo_user.daily_upload_reset = datetime.utcnow()
-        demo_user.daily_review_reset = datetime.utcnow()
-        db.session.add(demo_user)
-        db.session.flush()
-        
-        # Create test user for demo files
-        test_random_id = str(uuid.uuid4())[:8]
-        test_user = User()
-        test_user.username = f'test_user_{test_random_id}'
-        test_user.name = 'Test User'
-        test_user.email = f'testuser_{test_random_id}@alphanex.com'
-        test_user.password_hash = generate_password_hash('test123')
-        test_user.xp_points = 300
-        db.session.add(test_user)
-        db.session.flush()
-        
-        db.session.commit()
-        
-        # Store in session
-        session['demo_user_id'] = demo_user.id
-        session['test_user_id'] = test_user.id
-        session['user_name'] = 'Demo User'
-        
-        # Create test files
-        create_test_files(test_user)
-        
-        return demo_user
-        
-    except Exception as e:
-        app.logger.error(f"Demo user creation error: {e}")
-        db.session.rollback()
-        return None
-
-# Authentication routes removed - direct access to dashboard
-
-# Logout functionality not needed without authentication
+# The landing page (/) is the content feed in routes.py; the demo flow starts at /dashboard
 
 @app.route('/dashboard')
 def dashboard():
     """Dashboard with automatic demo user creation"""
     try:
-        # Ensure demo user exists
-        demo_user = ensure_demo_users()
-        if not demo_user:
-            return render_template('error.html', error="Failed to create demo user. Please try again.")
+        # Demo user for this session - saved on its first write
+        demo_user = get_demo_user()
         
         user_name = session.get('user_name', 'Demo User')
         
-        # Get user stats with error handling
-        upload_count = Upload.query.filter_by(user_id=demo_user.id).count()
-        review_count = Review.query.filter_by(reviewer_id=demo_user.id).count()
-        
-        # Get recent uploads
-        recent_uploads = Upload.query.filter_by(user_id=demo_user.id)\
-                                    .order_by(Upload.uploaded_at.desc()).limit(5).all()
-        
-        # Check daily upload limit
-        daily_remaining = demo_user.get_daily_upload_remaining()
-        daily_remaining_mb = daily_remaining / (1024 * 1024)
-        
-        # Check if user has reached XP threshold requiring account creation
-        xp_threshold_reached = demo_user.xp_points >= 1500
+        # Get user stats (cached per user, invalidated on every write that changes them)
+        stats = get_user_stats(demo_user)
         
         # Get motivational messages
         welcome_message = get_welcome_back_message(user_name)
         milestone_message = get_xp_milestone_message(user_name, demo_user.xp_points)
         daily_limit_message = get_daily_limit_reminder(
             user_name, 
-            demo_user.get_remaining_uploads_today(), 
-            demo_user.get_remaining_reviews_today()
+            stats['remaining_uploads_today'], 
+            stats['remaining_reviews_today']
         )
         
         return render_template('dashboard.html', 
-                             upload_count=upload_count,
-                             review_count=review_count,
-                             recent_uploads=recent_uploads,
-                             daily_remaining_mb=daily_remaining_mb,
+                             upload_count=stats['upload_count'],
+                             review_count=stats['review_count'],
+                             recent_uploads=stats['recent_uploads'],
+                             daily_remaining_mb=stats['daily_remaining_mb'],
+                             user=demo_user,
                              demo_user=demo_user,
-                             xp_threshold_reached=xp_threshold_reached,
+                             xp_threshold_reached=stats['xp_threshold_reached'],
                              welcome_message=welcome_message,
                              milestone_message=milestone_message,
                              daily_limit_message=daily_limit_message)
@@ -275,14 +70,25 @@ def dashboard():
         app.logger.error(f"Dashboard traceback: {traceback.format_exc()}")
         return render_template('error.html', error=f"Dashboard error: {str(e)}")
 
+@app.route('/api/dashboard_stats')
+def dashboard_stats():
+    """Dashboard summary as JSON for frontend refreshes"""
+    demo_user_id = session.get('demo_user_id')
+    demo_user = db.session.get(User, demo_user_id) if demo_user_id else None
+    if not demo_user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    stats = get_user_stats(demo_user)
+    for upload in stats['recent_uploads']:
+        upload['uploaded_at'] = upload['uploaded_at'].isoformat() if upload['uploaded_at'] else None
+    return jsonify(stats)
+
 @app.route('/upload', methods=['GET', 'POST'])
 def upload_file():
     """File upload endpoint"""
     try:
-        # Ensure demo user exists
-        demo_user = ensure_demo_users()
-        if not demo_user:
-            return render_template('error.html', error="Failed to create demo user. Please try again.")
+        # Demo user for this session - saved on its first write
+        demo_user = get_demo_user()
         
         user_name = session.get('user_name', 'Demo User')
     except Exception as e:
@@ -299,87 +105,93 @@ def upload_file():
         return redirect(url_for('dashboard'))
     
     # Check daily upload limit (3 uploads per day)
-    if not demo_user.can_upload_today():
-        remaining_uploads = demo_user.get_remaining_uploads_today()
+    if not can_upload_today(demo_user):
+        remaining_uploads = get_quota_usage(demo_user)['remaining_uploads']
         flash(f'Daily upload limit reached! You can upload {remaining_uploads} more files today. Limit resets at midnight.', 'warning')
         return redirect(url_for('dashboard'))
     
-    form = UploadForm()
+    # The file part streams in while the form is built - stop it once it passes today's remaining bytes
+    request.ingest_quota_bytes = get_quota_usage(demo_user)['remaining_bytes']
+    # A POST's transaction holds SQLite's write lock (see db_config.begin_sqlite_transaction);
+    # end it so the lock is not held while the file streams in
+    db.session.rollback()
+    try:
+        form = UploadForm()
+    except UploadRejected as e:
+        flash(str(e), 'error')
+        return redirect(url_for('upload_file'))
+    except RequestEntityTooLarge:
+        # Whole request body over MAX_CONTENT_LENGTH, refused before the file part was read
+        flash(too_large_message(current_app.config['MAX_UPLOAD_BYTES']), 'error')
+        return redirect(url_for('upload_file'))
     
     if form.validate_on_submit():
         file = form.file.data
         
         if file and allowed_file(file.filename):
-            # Check file size and daily limit
-            file_size = get_file_size(file)
-            
-            # Check 100MB limit per file
-            if file_size > 100 * 1024 * 1024:
-                flash('File too large! Maximum file size is 100MB per upload.', 'error')
-                return render_template('uploader/upload.html', form=form, demo_user=demo_user)
-            
-            if not demo_user.can_upload(file_size):
-                flash('Upload would exceed daily limits (3 uploads/day or 500MB total).', 'error')
-                return render_template('uploader/upload.html', form=form, demo_user=demo_user)
-            
+            demo_user = materialize_demo_user(demo_user)
             # Generate secure filename
             filename = secure_filename(file.filename)
             unique_filename = f"{uuid.uuid4()}_{filename}"
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
+            
+            stored_path = None
+            
+            def reserve(content_hash, file_size, file_path):
+                # Take today's quota slot and claim the content hash before the file moves to its
+                # shared content-addressed path, so a rejected upload never touches another's copy
+                if not consume_upload_quota(demo_user.id, file_size):
+                    raise UploadRejected('Daily upload limit reached! Limit resets at midnight.')
+                if not claim_blob(content_hash, file_path, file_size):
+                    db.session.rollback()
+                    raise UploadRejected('This exact file has already been uploaded.')
             
             try:
-                # Ensure upload directory exists
-                os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
-                file.save(file_path)
+                # Store in one pass: size cap, daily quota and file type are checked as bytes arrive,
+                # and the file lands at its content-hash key (see storage.py)
+                content_hash, file_size, stored_path = store_upload(file, get_storage(), current_app.config['MAX_UPLOAD_BYTES'],
+                                                                    lambda size: can_upload_today(demo_user, size), reserve)
                 
                 # Create upload record
                 upload = Upload()
                 upload.user_id = demo_user.id
                 upload.filename = unique_filename
                 upload.original_filename = filename
-                upload.file_path = file_path
+                upload.file_path = stored_path
                 upload.file_size = file_size
                 upload.description = form.description.data
                 upload.category = form.category.data
                 upload.ai_consent = form.ai_consent.data
                 upload.status = 'pending'  # Set initial status to pending review
                 
-                # Update user's daily upload count and award XP
-                demo_user.daily_upload_bytes += file_size
-                demo_user.daily_upload_count += 1  # Increment upload count
+                # Award XP (daily counters were updated by consume_upload_quota)
                 upload_xp = calculate_xp_reward('upload')
                 demo_user.xp_points += upload_xp
                 
                 db.session.add(upload)
-                db.session.commit()
+                db.session.flush()
+                create_tally(upload.id)
                 
-                # Run AI analysis with error handling
-                try:
-                    duplicate_score, spam_score = detect_duplicate_content(file_path, form.description.data)
-                    upload.duplicate_score = duplicate_score
-                    upload.spam_score = spam_score
-                    
-                    # Auto-flag if scores are high
-                    if duplicate_score > 0.8 or spam_score > 0.7:
-                        upload.status = 'flagged'
-                        demo_user.add_strike('uploader', f'High duplicate ({duplicate_score:.2f}) or spam ({spam_score:.2f}) score')
-                    
-                    db.session.commit()
-                except Exception as e:
-                    # AI analysis failed but upload should still succeed
-                    app.logger.error(f"AI analysis failed: {e}")
-                    # Set default safe values
-                    upload.duplicate_score = 0.0
-                    upload.spam_score = 0.0
-                    db.session.commit()
+                # Queue AI analysis - worker.py applies scores and auto-flagging
+                enqueue_job('analyze_upload', {'upload_id': upload.id})
+                enqueue_job('generate_previews', {'upload_id': upload.id})
+                invalidate_user_stats(demo_user.id)
+                db.session.commit()
                 
                 # Get motivational success message
                 success_message = get_upload_success_message(user_name, upload_xp, demo_user.daily_upload_count)
                 flash(success_message, 'success')
                 return redirect(url_for('dashboard'))
                 
+            except UploadRejected as e:
+                flash(str(e), 'error')
+                return render_template('uploader/upload.html', form=form, demo_user=demo_user)
             except Exception as e:
                 app.logger.error(f"Upload failed: {e}")
+                # Remove the file before rolling back: until then this request's uncommitted
+                # blob row makes any concurrent upload of the same bytes wait
+                if stored_path and os.path.exists(stored_path):
+                    os.remove(stored_path)
+                db.session.rollback()
                 flash(f'Upload failed: {str(e)}', 'error')
         else:
             if file:
@@ -389,7 +201,7 @@ def upload_file():
     
     # Calculate remaining daily upload capacity with error handling
     try:
-        daily_remaining = demo_user.get_daily_upload_remaining()
+        daily_remaining = get_quota_usage(demo_user)['remaining_bytes']
         daily_remaining_mb = daily_remaining / (1024 * 1024)
     except Exception as e:
         app.logger.error(f"Daily limit calculation failed: {e}")
@@ -401,10 +213,8 @@ def upload_file():
 def review_content():
     """Content review endpoint - shows all uploaded files for review"""
     try:
-        # Ensure demo user exists
-        demo_user = ensure_demo_users()
-        if not demo_user:
-            return render_template('error.html', error="Failed to create demo user. Please try again.")
+        # Demo user for this session - saved on its first write
+        demo_user = get_demo_user()
         
         user_name = session.get('user_name', 'Demo User')
     except Exception as e:
@@ -421,30 +231,14 @@ def review_content():
         return redirect(url_for('dashboard'))
     
     # Check daily review limit (5 reviews per day)
-    if not demo_user.can_review_today():
-        remaining_reviews = demo_user.get_remaining_reviews_today()
+    if not can_review_today(demo_user):
+        remaining_reviews = get_quota_usage(demo_user)['remaining_reviews']
         flash(f'Daily review limit reached! You can review {remaining_reviews} more items today. Limit resets at midnight.', 'warning')
         return redirect(url_for('dashboard'))
     
-    # Get uploads that need review (not from demo user and not already reviewed by them)
-    # Show all uploads except those uploaded by demo user
-    try:
-        reviewed_upload_ids = [r.upload_id for r in Review.query.filter_by(reviewer_id=demo_user.id).all()]
-    except Exception as e:
-        app.logger.error(f"Error getting reviewed uploads: {e}")
-        reviewed_upload_ids = []
-    
-    uploads = Upload.query.join(User).filter(
-        Upload.user_id != demo_user.id,  # Cannot review own uploads
-        ~Upload.id.in_(reviewed_upload_ids)  # Haven't reviewed yet
-    ).order_by(Upload.uploaded_at.desc()).all()
-    
-    # Filter out uploads that already have 5 reviews (max reached)
-    available_uploads = []
-    for upload in uploads:
-        review_count = Review.query.filter_by(upload_id=upload.id).count()
-        if review_count < 5:  # Max 5 reviews per upload
-            available_uploads.append(upload)
+    # Get uploads that need review: not from demo user, not already reviewed by them
+    # and under the 5 review cap - one query backed by the review tallies
+    available_uploads = get_open_uploads(demo_user.id)
     
     return render_template('reviewer/review.html', uploads=available_uploads, demo_user=demo_user)
 
@@ -452,10 +246,8 @@ def review_content():
 def review_upload(upload_id):
     """Review a specific upload"""
     try:
-        # Ensure demo user exists
-        demo_user = ensure_demo_users()
-        if not demo_user:
-            return render_template('error.html', error="Failed to create demo user. Please try again.")
+        # Demo user for this session - saved on its first write
+        demo_user = get_demo_user()
         
         user_name = session.get('user_name', 'Demo User')
     except Exception as e:
@@ -472,8 +264,8 @@ def review_upload(upload_id):
         return redirect(url_for('dashboard'))
     
     # Check daily review limit (5 reviews per day)
-    if not demo_user.can_review_today():
-        remaining_reviews = demo_user.get_remaining_reviews_today()
+    if not can_review_today(demo_user):
+        remaining_reviews = get_quota_usage(demo_user)['remaining_reviews']
         flash(f'Daily review limit reached! You can review {remaining_reviews} more items today. Limit resets at midnight.', 'warning')
         return redirect(url_for('dashboard'))
     
@@ -484,15 +276,15 @@ def review_upload(upload_id):
         flash('You cannot review your own uploads.', 'error')
         return redirect(url_for('review_content'))
     
-    # Check if user already reviewed this upload
+    # Check if user already reviewed this upload (probe on uq_review_upload_id_reviewer_id)
     existing_review = Review.query.filter_by(upload_id=upload_id, reviewer_id=demo_user.id).first()
     if existing_review:
         flash('You have already reviewed this upload.', 'error')
         return redirect(url_for('review_content'))
     
-    # Check if upload already has 5 reviews (max limit)
-    review_count = Review.query.filter_by(upload_id=upload_id).count()
-    if review_count >= 5:
+    # Check if upload already has 5 reviews (max limit) - shared demo fixtures stay open to everyone
+    fixture = is_demo_fixture(upload)
+    if not fixture and get_review_count(upload_id) >= MAX_REVIEWS_PER_UPLOAD:
         flash('This upload has reached the maximum number of reviews (5).', 'error')
         return redirect(url_for('review_content'))
     
@@ -504,6 +296,8 @@ def review_upload(upload_id):
             flash('You must provide a detailed reason (at least 10 characters) for negative reviews.', 'error')
             return render_template('reviewer/review_upload.html', upload=upload, form=form)
         
+        demo_user = materialize_demo_user(demo_user)
+        
         # Create review
         review = Review()
         review.upload_id = upload.id
@@ -512,46 +306,42 @@ def review_upload(upload_id):
         review.description = form.description.data
         review.xp_earned = calculate_xp_reward('review')
         
-        # Award XP to reviewer and increment daily counter
-        demo_user.xp_points += review.xp_earned
-        demo_user.daily_review_count += 1  # Increment review count
-        
+        # Count against today's review quota, then award XP - both atomic UPDATEs
+        if not consume_review_quota(demo_user.id):
+            flash('Daily review limit reached! Limit resets at midnight.', 'warning')
+            return redirect(url_for('dashboard'))
         db.session.add(review)
-        db.session.commit()
+        db.session.execute(
+            update(User).where(User.id == demo_user.id).values(xp_points=User.xp_points + review.xp_earned)
+        )
         
-        # Check if this is the 5th review - make final decision
-        total_reviews = Review.query.filter_by(upload_id=upload_id).count()
-        if total_reviews >= 5:
-            # Calculate final decision based on majority vote
-            good_reviews = Review.query.filter_by(upload_id=upload_id, rating='good').count()
-            bad_reviews = Review.query.filter_by(upload_id=upload_id, rating='bad').count()
-            
-            if good_reviews >= 3:
-                # Upload accepted - award XP to uploader
-                upload.status = 'approved'
-                uploader = User.query.get(upload.user_id)
-                if uploader:
-                    uploader.xp_points += calculate_xp_reward('upload_approved')
-                success_message = get_review_success_message(user_name, review.xp_earned, demo_user.daily_review_count)
-                flash(f'{success_message} Upload approved with {good_reviews} positive reviews!', 'success')
-            elif bad_reviews >= 3:
-                # Upload denied - take XP from uploader
-                upload.status = 'rejected'
-                uploader = User.query.get(upload.user_id)
-                if uploader:
-                    penalty = calculate_xp_reward('upload')  # Same amount as upload reward
-                    uploader.xp_points = max(0, uploader.xp_points - penalty)  # Don't go below 0
-                success_message = get_review_success_message(user_name, review.xp_earned, demo_user.daily_review_count)
-                flash(f'{success_message} Upload denied with {bad_reviews} negative reviews.', 'success')
+        # Count the vote and, on the 5th review, make the final decision in the same transaction.
+        # Fixture reviews are practice: the fixture's tally and status never change.
+        try:
+            if fixture:
+                counts, decision = None, 'practice'
             else:
-                upload.status = 'pending'  # Still needs more reviews
-                success_message = get_review_success_message(user_name, review.xp_earned, demo_user.daily_review_count)
-                flash(f'{success_message} Upload still pending ({total_reviews}/5 reviews complete).', 'success')
-            
+                counts = record_review(upload.id, review.rating)
+                decision = finalize_upload(upload.id, upload.user_id, counts)
+            invalidate_user_stats(demo_user.id, upload.user_id if decision in ('approved', 'rejected') else None)
             db.session.commit()
+        except IntegrityError:
+            # A concurrent submit of the same review lost the race on the unique index
+            db.session.rollback()
+            flash('You have already reviewed this upload.', 'error')
+            return redirect(url_for('review_content'))
+        
+        success_message = get_review_success_message(user_name, review.xp_earned, demo_user.daily_review_count)
+        if decision == 'approved':
+            flash(f'{success_message} Upload approved with {counts.good_count} positive reviews!', 'success')
+        elif decision == 'rejected':
+            flash(f'{success_message} Upload denied with {counts.bad_count} negative reviews.', 'success')
+        elif decision == 'practice':
+            flash(success_message, 'success')
+        elif decision == 'pending':
+            flash(f'{success_message} Upload still pending ({counts.review_count}/5 reviews complete).', 'success')
         else:
-            success_message = get_review_success_message(user_name, review.xp_earned, demo_user.daily_review_count)
-            flash(f'{success_message} Upload has {total_reviews}/5 reviews.', 'success')
+            flash(f'{success_message} Upload has {counts.review_count}/5 reviews.', 'success')
         
         return redirect(url_for('review_content'))
     
@@ -565,10 +355,8 @@ def review_upload(upload_id):
 def rate_website():
     """Website rating and feedback page"""
     try:
-        # Ensure demo user exists
-        demo_user = ensure_demo_users()
-        if not demo_user:
-            return render_template('error.html', error="Failed to create demo user. Please try again.")
+        # Demo user for this session - saved on its first write
+        demo_user = get_demo_user()
         
         user_name = session.get('user_name', 'Demo User')
     except Exception as e:
@@ -578,6 +366,8 @@ def rate_website():
     form = RatingForm()
     
     if form.validate_on_submit():
+        demo_user = materialize_demo_user(demo_user)
+        
         # Create rating record
         rating = Rating()
         rating.user_id = demo_user.id
@@ -598,30 +388,27 @@ def rate_website():
 def profile():
     """User profile page"""
     try:
-        # Ensure demo user exists
-        demo_user = ensure_demo_users()
-        if not demo_user:
-            return render_template('error.html', error="Failed to create demo user. Please try again.")
+        # Demo user for this session - saved on its first write
+        demo_user = get_demo_user()
         
         user_name = session.get('user_name', 'Demo User')
     except Exception as e:
         app.logger.error(f"Profile route error: {e}")
         return render_template('error.html', error=f"Profile error: {str(e)}")
         
-    # Get user's strikes and violation history
+    # Get user's strikes and violation history (a visitor not saved yet has none)
     strikes = Strike.query.filter_by(user_id=demo_user.id)\
-                         .order_by(Strike.created_at.desc()).all()
+                         .order_by(Strike.created_at.desc()).all() if demo_user.id else []
     
     return render_template('profile.html', strikes=strikes, 
-                         current_user=demo_user, demo_user=demo_user)
+                         user=demo_user, demo_user=demo_user)
 
 @app.route('/delete_upload/<int:upload_id>')
 def delete_upload(upload_id):
+    g.db_write = True  # A GET that writes - take the write lock at BEGIN
     try:
-        # Ensure demo user exists
-        demo_user = ensure_demo_users()
-        if not demo_user:
-            return render_template('error.html', error="Failed to create demo user. Please try again.")
+        # Demo user for this session - saved on its first write
+        demo_user = get_demo_user()
     except Exception as e:
         app.logger.error(f"Delete upload route error: {e}")
         return render_template('error.html', error=f"Delete upload error: {str(e)}")
@@ -645,13 +432,19 @@ def delete_upload(upload_id):
     else:
         flash('Content deleted within free window.', 'success')
     
-    # Delete file and record
+    # Delete file (once no other upload shares it) and record
     try:
-        if os.path.exists(upload.file_path):
-            os.remove(upload.file_path)
+        preview_paths = get_upload_preview_paths(upload.file_path)
+        if release_blob(upload.file_path):
+            for path in [upload.file_path] + preview_paths:
+                if os.path.exists(path):
+                    os.remove(path)
     except Exception as e:
         app.logger.error(f"Failed to delete file {upload.file_path}: {e}")
     
+    remove_upload(upload.id)
+    delete_tally(upload.id)
+    invalidate_user_stats(demo_user.id)
     db.session.delete(upload)
     db.session.commit()
     
@@ -662,10 +455,8 @@ def delete_upload(upload_id):
 @app.route('/admin')
 def admin_panel():
     try:
-        # Ensure demo user exists
-        demo_user = ensure_demo_users()
-        if not demo_user:
-            return render_template('error.html', error="Failed to create demo user. Please try again.")
+        # Demo user for this session - saved on its first write
+        demo_user = get_demo_user()
     except Exception as e:
         app.logger.error(f"Admin route error: {e}")
         return render_template('error.html', error=f"Admin error: {str(e)}")
@@ -712,3 +503,89 @@ def upload_status(upload_id):
         'can_delete_free': upload.can_delete_free(),
         'penalty': upload.get_deletion_penalty()
     })
+
+@app.route('/preview/<int:upload_id>/<variant>')
+def upload_preview(upload_id, variant):
+    """Serve a pre-rendered thumbnail, WebP preview or poster frame; 404 until the worker has made it"""
+    # Same access rule as the file itself (/files/<id>)
+    if not session.get('demo_user_id'):
+        abort(403)
+    if variant not in PREVIEW_VARIANTS:
+        abort(404)
+    upload = Upload.query.get_or_404(upload_id)
+    preview_path = get_upload_preview(upload.file_path, variant)
+    if not preview_path:
+        abort(404)
+    # Derivatives of an upload never change, so browsers can keep them
+    return send_stored_file(preview_path, max_age=86400)
+
+@app.route('/files/<int:upload_id>')
+def upload_file_content(upload_id):
+    """Stream an uploaded file to its owner or a reviewer, with Range and conditional GET support"""
+    if not session.get('demo_user_id'):
+        abort(403)
+    upload = Upload.query.get_or_404(upload_id)
+    blob = find_blob_by_path(upload.file_path)
+    if not os.path.exists(upload.file_path):
+        abort(404)
+    as_attachment = request.args.get('download') == '1' or not is_inline_media(upload.original_filename)
+    return send_stored_file(upload.file_path, digest=blob.digest if blob else None,
+                            download_name=upload.original_filename, as_attachment=as_attachment)
+
+@app.route('/api/search/uploads')
+def api_search_uploads():
+    """Ranked search over upload descriptions and file names: ?q=...&status=pending&page=2"""
+    if not session.get('demo_user_id'):
+        return jsonify({'error': 'Not logged in'}), 401
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    try:
+        results, has_more = search_uploads(query, page, status=request.args.get('status')) if query else ([], False)
+    except Exception as e:
+        app.logger.error(f"Upload search failed: {e}")
+        return jsonify({'error': 'Search is unavailable'}), 503
+    return jsonify({'query': query, 'page': page, 'results': results, 'has_more': has_more})
+
+@app.route('/api/upload_statuses')
+def upload_statuses():
+    """Batch version of upload_status: ?ids=1,2,3 returns every requested upload in one query"""
+    demo_user_id = session.get('demo_user_id')
+    if not demo_user_id:
+        return jsonify({'error': 'User not found'}), 404
+    
+    try:
+        upload_ids = [int(upload_id) for upload_id in request.args.get('ids', '').split(',') if upload_id]
+    except ValueError:
+        return jsonify({'error': 'Invalid upload ids'}), 400
+    upload_ids = upload_ids[:100]
+    
+    # Filtering on the owner here replaces the per-upload user lookup and access check
+    uploads = Upload.query.filter(Upload.id.in_(upload_ids), Upload.user_id == demo_user_id).all() if upload_ids else []
+    
+    now = datetime.utcnow()
+    return jsonify({'uploads': {
+        str(upload.id): {
+            'status': upload.status,
+            'hours_remaining': max(0, (upload.deletion_deadline - now).total_seconds() / 3600),
+            'can_delete_free': upload.can_delete_free(),
+            'penalty': upload.get_deletion_penalty()
+        } for upload in uploads
+    }})
+
+@app.route('/api/upload_events')
+def upload_events():
+    """Server-Sent Events stream of status changes (approved/rejected/flagged) for the user's uploads"""
+    demo_user_id = session.get('demo_user_id')
+    if not demo_user_id:
+        return jsonify({'error': 'User not found'}), 404
+    
+    if not current_app.config['SSE_ENABLED']:
+        # A sync worker would be held for the whole stream; 204 tells EventSource not to reconnect
+        return Response(status=204)
+    
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    response = Response(stream_with_context(stream_status_events(demo_user_id, last_event_id)),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
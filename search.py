@@ -0,0 +1,140 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import text
+from app import app, db
+
+# Alpha Nex Full-text Search
+# Backed by FTS5 on SQLite and a generated tsvector column with a GIN index on
+# Postgres (both created by migrations 4 and 5 in migrations.py). Results are
+# ranked (bm25 / ts_rank_cd) and paged; highlights come back as escaped HTML
+# with <mark> tags.
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+SEARCH_MAX_PAGE = 50  # Deep offsets on a ranked list are never useful and only cost scans
+
+# Highlight markers that cannot appear in stored text; swapped for <mark> after escaping
+_START, _STOP = "\x02", "\x03"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# columns: FTS5 index order (see migrations.py); highlight: fields returned with
+# every match marked; snippet: long field returned as a short excerpt; weights:
+# bm25 weight per indexed column
+SEARCH_TABLES = {
+    "content": {"columns": ["title", "description", "category"], "highlight": ["title", "category"],
+                "snippet": "description", "weights": "10.0, 2.0, 5.0"},
+    "upload": {"columns": ["original_filename", "description"], "highlight": ["original_filename"],
+               "snippet": "description", "weights": "5.0, 1.0"},
+}
+
+def to_fts5_query(query):
+    """
+    Turn free text into a safe FTS5 expression: every word must match, and the
+    last one also matches as a prefix so partially typed words still find results.
+    """
+    tokens = _TOKEN.findall(query.lower())[:10]
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def render_highlight(value):
+    """Escape stored text and turn highlight markers into <mark> tags."""
+    if value is None:
+        return Markup("")
+    return Markup(str(escape(value)).replace(_START, "<mark>").replace(_STOP, "</mark>"))
+
+def _sqlite_search(table, where):
+    spec = SEARCH_TABLES[table]
+    fts_table = f"{table}_fts"
+    highlights = ", ".join(
+        f"highlight({fts_table}, {spec['columns'].index(column)}, :start, :stop) AS {column}"
+        for column in spec["highlight"])
+    snippet = (f"snippet({fts_table}, {spec['columns'].index(spec['snippet'])}, :start, :stop, '…', 24) "
+               f"AS {spec['snippet']}")
+    return (f"SELECT t.id, bm25({fts_table}, {spec['weights']}) AS rank, {highlights}, {snippet} "
+            f"FROM {fts_table} JOIN {table} t ON t.id = {fts_table}.rowid "
+            f"WHERE {fts_table} MATCH :match {where} ORDER BY rank LIMIT :limit OFFSET :offset")
+
+def _postgres_search(table, where):
+    spec = SEARCH_TABLES[table]
+    highlights = ", ".join(
+        f"ts_headline('english', coalesce(t.{column}, ''), q, :full_options) AS {column}"
+        for column in spec["highlight"])
+    snippet = (f"ts_headline('english', coalesce(t.{spec['snippet']}, ''), q, :snippet_options) "
+               f"AS {spec['snippet']}")
+    # ts_headline re-parses each document, so only run it for the page being returned
+    return (f"SELECT t.id, page.rank, {highlights}, {snippet} FROM ("
+            f"SELECT t.id, ts_rank_cd(t.search_vector, q) AS rank FROM {table} t, "
+            f"websearch_to_tsquery('english', :query) q WHERE t.search_vector @@ q {where} "
+            f"ORDER BY rank DESC, t.id DESC LIMIT :limit OFFSET :offset) page "
+            f"JOIN {table} t ON t.id = page.id, websearch_to_tsquery('english', :query) q "
+            f"ORDER BY page.rank DESC, t.id DESC")
+
+def search(table, query, page=1, page_size=None, where="", params=None):
+    """
+    Ranked full-text search over a table in SEARCH_TABLES. `where` is an extra
+    SQL condition on alias t (e.g. "AND t.status = :status") with its params.
+    Returns (rows, has_more); each row is a dict of id, rank and highlighted fields.
+    """
+    page_size = max(1, min(page_size or SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE))
+    page = max(1, min(page, SEARCH_MAX_PAGE))
+    offset = (page - 1) * page_size
+    limit = page_size + 1  # One extra row tells us whether there is a next page
+
+    query_params = {"limit": limit, "offset": offset, "start": _START, "stop": _STOP}
+    if db.engine.dialect.name == "postgresql":
+        if not _TOKEN.search(query):
+            return [], False
+        sql = _postgres_search(table, where)
+        markers = f"StartSel={_START}, StopSel={_STOP}"
+        query_params.update({"query": query,
+                             "full_options": f"{markers}, HighlightAll=true",
+                             "snippet_options": f"{markers}, MaxFragments=2, MaxWords=24, MinWords=8"})
+    else:
+        match = to_fts5_query(query)
+        if not match:
+            return [], False
+        sql = _sqlite_search(table, where)
+        query_params["match"] = match
+
+    query_params.update(params or {})
+    rows = db.session.execute(text(sql), query_params).mappings().all()
+
+    spec = SEARCH_TABLES[table]
+    results = []
+    for row in rows[:page_size]:
+        result = {"id": row["id"], "rank": float(row["rank"])}
+        for column in spec["highlight"] + [spec["snippet"]]:
+            result[column] = render_highlight(row[column])
+        results.append(result)
+    return results, len(rows) > page_size
+
+def search_contents(query, page=1, page_size=None):
+    return search("content", query, page, page_size)
+
+def search_uploads(query, page=1, page_size=None, status=None):
+    """Search upload descriptions and file names, optionally within one review status."""
+    if status:
+        return search("upload", query, page, page_size, "AND t.status = :status", {"status": status})
+    return search("upload", query, page, page_size)
+
+def reindex(table):
+    """Rebuild a table's search index from its rows."""
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(text(f"REINDEX INDEX ix_{table}_search_vector"))
+    else:
+        db.session.execute(text(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')"))
+    db.session.commit()
+
+@app.cli.command("search-reindex")
+def search_reindex_command():
+    """Rebuild the full-text indexes (after bulk loads or restoring a backup)."""
+    for table in SEARCH_TABLES:
+        try:
+            reindex(table)
+            print(f"Reindexed {table}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Reindex of {table} failed: {e}")
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import random
+import re
+from flask import has_app_context
+from sqlalchemy import and_, or_
+
+# Alpha Nex Near-Duplicate Detection
+# MinHash signatures over shingles, indexed with LSH banding: signatures are cut
+# into BANDS bands of ROWS values and each band is stored as one bucket hash.
+# Uploads sharing any bucket are candidates, so lookup is an index probe.
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+FILE_SAMPLE_BYTES = int(os.environ.get("SIMILARITY_FILE_SAMPLE_BYTES", str(64 * 1024)))
+DUPLICATE_THRESHOLD = float(os.environ.get("SIMILARITY_DUPLICATE_THRESHOLD", "0.85"))
+UNIQUE_THRESHOLD = float(os.environ.get("SIMILARITY_UNIQUE_THRESHOLD", "0.3"))
+
+# Fixed seed so every process (and every deploy) produces comparable signatures
+_rng = random.Random(1337)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Set of lowercased word shingles of a text."""
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def byte_shingles(data, size=8, step=4):
+    """Set of overlapping byte windows for binary content."""
+    return {data[i:i + size] for i in range(0, max(1, len(data) - size + 1), step)}
+
+def _hash64(feature):
+    if isinstance(feature, str):
+        feature = feature.encode()
+    return int.from_bytes(hashlib.blake2b(feature, digest_size=8).digest(), "big")
+
+def minhash(features):
+    """MinHash signature (list of NUM_PERM ints) of a feature set. Returns None if empty."""
+    hashes = [_hash64(feature) for feature in features]
+    if not hashes:
+        return None
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+def get_buckets(signature):
+    """One 63-bit bucket hash per band, so it fits a signed BIGINT column."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        buckets.append(_hash64(",".join(map(str, rows))) >> 1)
+    return buckets
+
+def similarity_score(a, b):
+    """Estimated Jaccard similarity 0.0-1.0 of two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+def signature_for_text(text):
+    return minhash(shingles(text))
+
+def signature_for_file(file_path):
+    """Signature of the first FILE_SAMPLE_BYTES of a file. Returns None if unreadable."""
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read(FILE_SAMPLE_BYTES)
+    except OSError:
+        return None
+
+    try:
+        return signature_for_text(data.decode("utf-8"))
+    except UnicodeDecodeError:
+        return minhash(byte_shingles(data))
+
+def get_signatures(description, file_path=None):
+    """Return {source: signature} for a description and optional file."""
+    signatures = {}
+    description_signature = signature_for_text(description)
+    if description_signature is not None:
+        signatures["description"] = description_signature
+    if file_path:
+        file_signature = signature_for_file(file_path)
+        if file_signature is not None:
+            signatures["file"] = file_signature
+    return signatures
+
+def index_upload(upload_id, description, file_path=None):
+    """Add an upload's signatures and LSH buckets to the index. Caller commits."""
+    from app import db
+    from models import SimilaritySignature, SimilarityBucket
+
+    for source, signature in get_signatures(description, file_path).items():
+        record = SimilaritySignature()
+        record.upload_id = upload_id
+        record.source = source
+        record.signature = signature
+        db.session.add(record)
+
+        for band, bucket in enumerate(get_buckets(signature)):
+            entry = SimilarityBucket()
+            entry.upload_id = upload_id
+            entry.source = source
+            entry.band = band
+            entry.bucket = bucket
+            db.session.add(entry)
+
+def remove_upload(upload_id):
+    """Drop an upload from the index. Caller commits."""
+    from models import SimilaritySignature, SimilarityBucket
+    SimilarityBucket.query.filter_by(upload_id=upload_id).delete()
+    SimilaritySignature.query.filter_by(upload_id=upload_id).delete()
+
+def find_similar(description, file_path=None, limit=5, exclude_upload_id=None):
+    """
+    Nearest existing uploads by estimated Jaccard similarity.
+    Returns list of dicts with upload_id, similarity and source, best first.
+    """
+    from app import db
+    from models import SimilaritySignature, SimilarityBucket
+
+    best = {}
+    for source, signature in get_signatures(description, file_path).items():
+        bucket_match = or_(*[and_(SimilarityBucket.band == band, SimilarityBucket.bucket == bucket)
+                             for band, bucket in enumerate(get_buckets(signature))])
+        candidates = db.session.query(SimilarityBucket.upload_id).filter(
+            SimilarityBucket.source == source, bucket_match
+        )
+        if exclude_upload_id is not None:
+            candidates = candidates.filter(SimilarityBucket.upload_id != exclude_upload_id)
+        candidate_ids = {row.upload_id for row in candidates.distinct().limit(500)}
+        if not candidate_ids:
+            continue
+
+        records = SimilaritySignature.query.filter(
+            SimilaritySignature.source == source,
+            SimilaritySignature.upload_id.in_(candidate_ids)
+        ).all()
+        for record in records:
+            score = similarity_score(signature, record.signature)
+            if score > best.get(record.upload_id, {}).get("similarity", -1):
+                best[record.upload_id] = {"upload_id": record.upload_id,
+                                          "similarity": score, "source": source}
+
+    return sorted(best.values(), key=lambda match: match["similarity"], reverse=True)[:limit]
+
+def local_duplicate_score(description, file_path=None, exclude_upload_id=None):
+    """
+    Best local similarity and whether it is decisive on its own.
+    Returns tuple of (score, decisive). Outside an app context nothing is decisive.
+    """
+    if not has_app_context():
+        return 0.0, False
+
+    matches = find_similar(description, file_path, limit=1, exclude_upload_id=exclude_upload_id)
+    score = matches[0]["similarity"] if matches else 0.0
+    decisive = score >= DUPLICATE_THRESHOLD or score < UNIQUE_THRESHOLD
+    return score, decisive
@@ -473,21 +473,22 @@
                 setInterval(() => {
                     this.updateUploadStatuses();
                 }, this.config.refreshInterval);
+                
+                // Status changes are pushed as they happen when the server runs an async
+                // worker class; under sync workers a stream would pin a whole worker
+                if (document.body.dataset.statusEvents === 'on') {
+                    this.subscribeToStatusEvents();
+                }
             }
         },
         
-        // Update upload statuses
+        // Update upload statuses - one batch request for every row on the page
         updateUploadStatuses: function() {
-            const uploadRows = document.querySelectorAll('[data-upload-id]');
-            uploadRows.forEach(row => {
-                const uploadId = row.dataset.uploadId;
-                this.checkUploadStatus(uploadId);
-            });
-        },
-        
-        // Check upload status
-        checkUploadStatus: function(uploadId) {
-            fetch(`/api/upload_status/${uploadId}`)
+            const uploadIds = Array.from(document.querySelectorAll('[data-upload-id]'))
+                .map(row => row.dataset.uploadId);
+            if (uploadIds.length === 0) return;
+            
+            fetch(`/api/upload_statuses?ids=${uploadIds.join(',')}`)
                 .then(response => response.json())
                 .then(data => {
                     if (data.error) {
@@ -496,21 +497,43 @@
                     }
                     
                     // Update UI based on status
-                    this.updateUploadStatusUI(uploadId, data);
+                    Object.entries(data.uploads).forEach(([uploadId, status]) => {
+                        this.updateUploadStatusUI(uploadId, status);
+                    });
                 })
                 .catch(error => {
                     console.error('Status check failed:', error);
                 });
         },
         
+        // Listen for server-pushed status changes
+        subscribeToStatusEvents: function() {
+            if (typeof EventSource === 'undefined') return;
+            
+            const source = new EventSource('/api/upload_events');
+            source.addEventListener('status', (e) => {
+                const data = JSON.parse(e.data);
+                this.updateUploadStatusUI(data.upload_id, {status: data.status});
+                
+                const type = data.status === 'approved' ? 'success' : data.status === 'rejected' ? 'danger' : 'warning';
+                this.showNotification(`One of your uploads was ${data.status}.`, type);
+            });
+        },
+        
         // Update upload status UI
         updateUploadStatusUI: function(uploadId, data) {
             const row = document.querySelector(`[data-upload-id="${uploadId}"]`);
             if (!row) return;
             
+            // Update status badge
+            const statusEl = row.querySelector('.upload-status');
+            if (statusEl && data.status) {
+                statusEl.textContent = data.status;
+            }
+            
             // Update countdown timer
             const countdownEl = row.querySelector('.countdown');
-            if (countdownEl) {
+            if (countdownEl && data.hours_remaining !== undefined) {
                 if (data.hours_remaining > 0) {
                     const hours = Math.floor(data.hours_remaining);
                     const minutes = Math.floor((data.hours_remaining - hours) * 60);
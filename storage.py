@@ -0,0 +1,171 @@
+import hashlib
+import os
+import re
+import shutil
+from flask import current_app
+from sqlalchemy import update
+from app import app, db
+
+# Alpha Nex Upload Storage
+# Files are content-addressed under a two-level hash shard, ab/cd/<digest>.<ext>,
+# so no directory grows past a few hundred entries and identical bytes land
+# on the same key. Callers work with keys; Upload.file_path records
+# local_path(key) because analysis, previews and sendfile need a real file.
+# A remote backend (e.g. an S3-compatible store) implements the same methods
+# and makes local_path() return a locally cached copy.
+
+SHARDED_KEY = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]+)?$')
+
+class StorageBackend:
+    """Interface for upload storage. Keys are relative, '/'-separated paths."""
+
+    def key_for(self, digest, filename=None):
+        extension = filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+        extension = re.sub(r'[^a-z0-9]', '', extension)[:10]
+        return f"{digest[:2]}/{digest[2:4]}/{digest}" + (f".{extension}" if extension else '')
+
+    def local_path(self, key):
+        raise NotImplementedError
+
+    def key_from_path(self, file_path):
+        """Key for a path recorded in Upload.file_path, or None if it is outside the sharded layout."""
+        raise NotImplementedError
+
+    def put_file(self, source_path, key):
+        """Move a finished local file (e.g. an ingest temp file) to key. Keeps an existing copy."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+class LocalStorage(StorageBackend):
+    """Sharded directory tree under UPLOAD_FOLDER."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def local_path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def key_from_path(self, file_path):
+        relative = os.path.relpath(file_path, self.root).replace(os.sep, '/')
+        return relative if SHARDED_KEY.match(relative) else None
+
+    def put_file(self, source_path, key):
+        dest = self.local_path(key)
+        if os.path.exists(dest):
+            # Same key means same content - the stored copy is already correct
+            os.remove(source_path)
+            return dest
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(source_path, dest)
+        return dest
+
+    def exists(self, key):
+        return os.path.exists(self.local_path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+def get_storage():
+    backend = current_app.config.get("STORAGE_BACKEND", "local")
+    if backend == "local":
+        return LocalStorage(current_app.config["UPLOAD_FOLDER"])
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+def _hash_file(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _link_or_copy(source, dest):
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    try:
+        os.link(source, dest)
+    except OSError:
+        # Different filesystem, or links unsupported - copy through a temp name
+        tmp_path = f"{dest}.migrating"
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, dest)
+
+def migrate_file(storage, old_path):
+    """
+    Re-home one legacy file and every Upload that points at it. Caller commits.
+    The old file is left in place; returns its path for deletion after the commit,
+    so a crash at any point leaves the database pointing at a file that exists.
+    """
+    from models import Upload, FileBlob
+
+    blob = FileBlob.query.filter_by(file_path=old_path).first()
+    digest = blob.digest if blob else _hash_file(old_path)
+    digest_blob = blob or FileBlob.query.filter_by(digest=digest).first()
+
+    if digest_blob is not None and digest_blob is not blob and os.path.exists(digest_blob.file_path):
+        # Content already registered under another path - these uploads share that copy
+        new_path = digest_blob.file_path
+    else:
+        new_path = storage.local_path(storage.key_for(digest, old_path))
+        if not os.path.exists(new_path):
+            _link_or_copy(old_path, new_path)
+
+    moved = db.session.execute(
+        update(Upload).where(Upload.file_path == old_path).values(file_path=new_path)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if digest_blob is None:
+        digest_blob = FileBlob()
+        digest_blob.digest = digest
+        digest_blob.size = os.path.getsize(new_path)
+        digest_blob.ref_count = moved
+        db.session.add(digest_blob)
+    elif digest_blob is not blob:
+        # These uploads become extra references
+        digest_blob.ref_count = FileBlob.ref_count + moved
+    digest_blob.file_path = new_path
+    return old_path
+
+@app.cli.command("storage-migrate")
+def storage_migrate_command():
+    """Move flat UPLOAD_FOLDER files into the sharded layout, a batch per commit. Safe to re-run."""
+    from models import Upload
+
+    storage = get_storage()
+    batch_size = int(os.environ.get("STORAGE_MIGRATE_BATCH", "200"))
+    migrated = skipped = 0
+    last_path = ''
+
+    while True:
+        # Keyset over distinct paths, so progress survives restarts and shared files move once
+        paths = [row[0] for row in db.session.query(Upload.file_path)
+                 .filter(Upload.file_path > last_path).group_by(Upload.file_path)
+                 .order_by(Upload.file_path).limit(batch_size)]
+        if not paths:
+            break
+        last_path = paths[-1]
+
+        done = []
+        for old_path in paths:
+            if storage.key_from_path(old_path):
+                continue
+            if not os.path.exists(old_path):
+                print(f"Missing file, left as is: {old_path}")
+                skipped += 1
+                continue
+            done.append(migrate_file(storage, old_path))
+        db.session.commit()
+
+        for old_path in done:
+            os.remove(old_path)
+        migrated += len(done)
+        print(f"Migrated {migrated} files ({skipped} missing)")
+
+    print(f"Done: {migrated} files moved, {skipped} missing")
@@ -0,0 +1,130 @@
+import os
+from app import app, db
+from job_queue import enqueue_job, job_handler
+from openai_service import (OPENAI_API_KEY, check_content_quality_batch, detect_duplicate_content,
+                            detect_duplicate_content_batch)
+from similarity import index_upload, local_duplicate_score, remove_upload
+from user_stats import invalidate_user_stats
+from upload_events import record_status_event
+from previews import generate_previews
+from blob_store import find_blob_by_path
+
+# Alpha Nex Background Tasks
+
+@job_handler('analyze_upload')
+def analyze_upload(payload):
+    """Run AI duplicate/spam analysis for an upload and auto-flag it if needed."""
+    from models import Upload, User
+
+    upload = db.session.get(Upload, payload['upload_id'])
+    if not upload:
+        # Upload was deleted before analysis ran - nothing to do
+        return
+
+    upload_id = payload['upload_id']
+    file_path, description = upload.file_path, upload.description
+    local_result = local_duplicate_score(description, file_path, exclude_upload_id=upload_id)
+    # End the read transaction before the slow AI call so the write below stays short
+    db.session.rollback()
+
+    duplicate_score, spam_score = detect_duplicate_content(file_path, description, raise_errors=True,
+                                                             local_result=local_result)
+    upload.duplicate_score = duplicate_score
+    upload.spam_score = spam_score
+
+    # Auto-flag if scores are high, unless reviewers already decided. Without an API key the
+    # spam score is only a keyword match, which is not enough to flag or strike anyone.
+    spam_flag = OPENAI_API_KEY and spam_score > 0.7
+    if (duplicate_score > 0.8 or spam_flag) and upload.status == 'pending':
+        upload.status = 'flagged'
+        uploader = db.session.get(User, upload.user_id)
+        if uploader:
+            uploader.add_strike('uploader', f'High duplicate ({duplicate_score:.2f}) or spam ({spam_score:.2f}) score')
+        invalidate_user_stats(upload.user_id)
+        record_status_event(upload.id, upload.user_id, 'flagged')
+
+    # Add to the near-duplicate index so later uploads are compared against this one
+    remove_upload(upload.id)
+    index_upload(upload.id, upload.description, upload.file_path)
+
+    db.session.commit()
+
+@job_handler('rescore_uploads')
+def rescore_uploads(payload):
+    """Re-score a backlog of uploads with batched AI calls instead of one call per upload."""
+    from models import Upload
+
+    uploads = Upload.query.filter(Upload.id.in_(payload['upload_ids'])).all()
+    descriptions = [upload.description for upload in uploads]
+    db.session.rollback()
+    # Failed requests raise so the queue retries; unscored items come back as None
+    scores = detect_duplicate_content_batch(descriptions, raise_errors=True)
+
+    unscored = 0
+    for upload, score in zip(uploads, scores):
+        if score is None:
+            # Keep the stored scores rather than overwrite them with a placeholder
+            unscored += 1
+            continue
+        upload.duplicate_score, upload.spam_score = score
+
+    db.session.commit()
+    if unscored and OPENAI_API_KEY:
+        # Scored items are cached now, so the retry only pays for the missing ones
+        raise RuntimeError(f"{unscored} of {len(uploads)} uploads got no usable score")
+
+@job_handler('score_reviews')
+def score_reviews(payload):
+    """Fill in review quality scores with batched AI calls."""
+    from models import Review
+
+    reviews = Review.query.filter(Review.id.in_(payload['review_ids'])).all()
+    texts = [review.description for review in reviews]
+    db.session.rollback()
+    scores = check_content_quality_batch(texts, raise_errors=True)
+
+    unscored = 0
+    for review, score in zip(reviews, scores):
+        if score is None:
+            unscored += 1
+            continue
+        review.quality_score = score
+
+    db.session.commit()
+    if unscored and OPENAI_API_KEY:
+        raise RuntimeError(f"{unscored} of {len(reviews)} reviews got no usable score")
+
+@app.cli.command("ai-rescore")
+def ai_rescore_command():
+    """Queue batched AI re-scoring of pending uploads and unscored reviews; worker.py runs the jobs."""
+    from models import Review, Upload
+
+    if not OPENAI_API_KEY:
+        print("OPENAI_API_KEY is not set - nothing would be scored")
+        return
+    batch_size = int(os.environ.get("RESCORE_BATCH_SIZE", "50"))
+    upload_ids = [row[0] for row in db.session.query(Upload.id)
+                  .filter(Upload.status == 'pending').order_by(Upload.id)]
+    review_ids = [row[0] for row in db.session.query(Review.id)
+                  .filter(Review.quality_score.is_(None), Review.description != '').order_by(Review.id)]
+    for start in range(0, len(upload_ids), batch_size):
+        enqueue_job('rescore_uploads', {'upload_ids': upload_ids[start:start + batch_size]})
+    for start in range(0, len(review_ids), batch_size):
+        enqueue_job('score_reviews', {'review_ids': review_ids[start:start + batch_size]})
+    db.session.commit()
+    print(f"Queued {len(upload_ids)} pending uploads and {len(review_ids)} reviews in batches of {batch_size}")
+
+@job_handler('generate_previews')
+def generate_upload_previews(payload):
+    """Render reviewer thumbnails/previews (images) or a poster frame (videos) for an upload."""
+    from models import Upload
+
+    upload = db.session.get(Upload, payload['upload_id'])
+    blob = find_blob_by_path(upload.file_path) if upload else None
+    if not blob:
+        # Deleted, or stored before content hashes were recorded
+        return
+    file_path, filename, digest = upload.file_path, upload.original_filename, blob.digest
+    db.session.rollback()
+
+    generate_previews(file_path, filename, digest)
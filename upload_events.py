@@ -0,0 +1,75 @@
+import json
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from models import UploadStatusEvent
+
+# Alpha Nex Upload Status Events
+# Status changes are appended to UploadStatusEvent by whichever process makes
+# them, so an SSE stream in any gunicorn worker can pick them up.
+
+def record_status_event(upload_id, user_id, status):
+    """Append a status change to the feed. Caller commits."""
+    event = UploadStatusEvent()
+    event.upload_id = upload_id
+    event.user_id = user_id
+    event.status = status
+    db.session.add(event)
+
+def get_events_since(user_id, last_event_id, limit=100):
+    """
+    Status events for a user newer than last_event_id, oldest first, as plain rows
+    (id, upload_id, status, created_at) that stay readable after the transaction ends.
+    """
+    return db.session.execute(
+        select(UploadStatusEvent.id, UploadStatusEvent.upload_id, UploadStatusEvent.status,
+               UploadStatusEvent.created_at)
+        .where(UploadStatusEvent.user_id == user_id, UploadStatusEvent.id > last_event_id)
+        .order_by(UploadStatusEvent.id).limit(limit)
+    ).all()
+
+def get_latest_event_id(user_id):
+    latest = db.session.query(db.func.max(UploadStatusEvent.id)).filter(
+        UploadStatusEvent.user_id == user_id
+    ).scalar()
+    return latest or 0
+
+def stream_status_events(user_id, last_event_id=None):
+    """
+    Generate Server-Sent Events for a user's upload status changes.
+    Runs for at most SSE_MAX_DURATION seconds; EventSource reconnects with
+    Last-Event-ID and the stream resumes where it stopped.
+    """
+    poll_interval = current_app.config['SSE_POLL_INTERVAL']
+    deadline = time.monotonic() + current_app.config['SSE_MAX_DURATION']
+
+    if last_event_id is None:
+        # New subscriber - only changes from now on
+        last_event_id = get_latest_event_id(user_id)
+        db.session.rollback()
+
+    yield f"retry: {int(poll_interval * 1000)}\n\n"
+
+    while time.monotonic() < deadline:
+        events = get_events_since(user_id, last_event_id)
+        # End the read transaction so the next poll sees new commits and the connection is released
+        db.session.rollback()
+
+        for event in events:
+            last_event_id = event.id
+            data = json.dumps({'upload_id': event.upload_id, 'status': event.status,
+                               'created_at': event.created_at.isoformat()})
+            yield f"id: {event.id}\nevent: status\ndata: {data}\n\n"
+
+        if not events:
+            yield ": keepalive\n\n"
+        time.sleep(poll_interval)
+
+def prune_status_events(max_age_hours=24):
+    """Delete events older than max_age_hours. Returns the number removed."""
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    removed = UploadStatusEvent.query.filter(UploadStatusEvent.created_at < cutoff).delete()
+    db.session.commit()
+    return removed
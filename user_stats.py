@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import UserStatsCache
+from quota import get_quota_usage
+
+# Alpha Nex Dashboard Stats
+# History-dependent parts of the dashboard (counts, recent uploads) are computed in
+# one query and cached per user. Writers call invalidate_user_stats() in the same
+# transaction as the change, so the cache never outlives the data it summarises.
+# Invalidation empties the row and moves its updated_at rather than deleting it,
+# and a reader stores its result (on its own connection, leaving the request's
+# session alone) only if the row still has the updated_at it read before
+# computing - so a summary computed before an invalidation is never written after it.
+# Live fields (XP, daily quotas) come straight from the already-loaded User row
+# (quotas via quota.get_quota_usage, so a stale day reads as zero).
+
+RECENT_UPLOADS = 5
+
+def _compute_history(user_id):
+    """Upload count, review count and recent uploads for a user in one query."""
+    from models import Upload, Review
+
+    upload_count = select(func.count(Upload.id)).where(Upload.user_id == user_id).scalar_subquery()
+    review_count = select(func.count(Review.id)).where(Review.reviewer_id == user_id).scalar_subquery()
+
+    # Counts ride along on the recent-uploads rows; users with no uploads still get one row
+    recent = (select(Upload.id, Upload.original_filename, Upload.category, Upload.file_size,
+                     Upload.status, Upload.uploaded_at)
+              .where(Upload.user_id == user_id)
+              .order_by(Upload.uploaded_at.desc())
+              .limit(RECENT_UPLOADS)
+              .subquery())
+    rows = db.session.execute(
+        select(upload_count.label('upload_count'), review_count.label('review_count'), recent)
+        .select_from(select(func.count().label('one')).subquery())
+        .outerjoin(recent, db.true())
+        .order_by(recent.c.uploaded_at.desc())
+    ).all()
+
+    recent_uploads = [{
+        'id': row.id,
+        'original_filename': row.original_filename,
+        'category': row.category,
+        'file_size': row.file_size,
+        'status': row.status,
+        'uploaded_at': row.uploaded_at.isoformat() if row.uploaded_at else None
+    } for row in rows if row.id is not None]
+
+    return {
+        'upload_count': rows[0].upload_count,
+        'review_count': rows[0].review_count,
+        'recent_uploads': recent_uploads
+    }
+
+def _store_history(user_id, history, seen_updated_at):
+    """Write a computed summary unless the row changed since it was read."""
+    table = UserStatsCache.__table__
+    values = {'summary': history, 'updated_at': datetime.utcnow()}
+    with db.engine.begin() as conn:
+        if seen_updated_at is not None:
+            conn.execute(update(table).where(table.c.user_id == user_id,
+                                             table.c.updated_at == seen_updated_at).values(**values))
+            return
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(table).values(user_id=user_id, **values))
+        except IntegrityError:
+            # Cached or invalidated by another request meanwhile - theirs is newer
+            pass
+
+def _load_history(user_id):
+    """Cached history summary for a user, recomputed on a miss or after STATS_CACHE_MAX_AGE."""
+    cached = db.session.execute(
+        select(UserStatsCache.summary, UserStatsCache.updated_at).where(UserStatsCache.user_id == user_id)
+    ).first()
+    max_age = timedelta(seconds=current_app.config['STATS_CACHE_MAX_AGE'])
+    if cached and cached.summary and cached.updated_at > datetime.utcnow() - max_age:
+        return cached.summary
+
+    history = _compute_history(user_id)
+    try:
+        _store_history(user_id, history, cached.updated_at if cached else None)
+    except Exception as e:
+        # The computed values are still good - the next request tries again
+        current_app.logger.warning(f"Stats cache write failed: {e}")
+    return history
+
+def get_user_stats(user):
+    """Full dashboard summary: cached history plus live XP and daily quota fields."""
+    if user.id is None:
+        # Demo visitor not saved yet (see demo.py) - no history and nothing to cache
+        history = {'upload_count': 0, 'review_count': 0, 'recent_uploads': []}
+    else:
+        history = _load_history(user.id)
+    recent_uploads = []
+    for upload in history['recent_uploads']:
+        upload = dict(upload)
+        if upload['uploaded_at']:
+            upload['uploaded_at'] = datetime.fromisoformat(upload['uploaded_at'])
+        recent_uploads.append(upload)
+
+    quota = get_quota_usage(user)
+    daily_remaining = quota['remaining_bytes']
+    return {
+        'upload_count': history['upload_count'],
+        'review_count': history['review_count'],
+        'recent_uploads': recent_uploads,
+        'xp_points': user.xp_points,
+        'daily_remaining_bytes': daily_remaining,
+        'daily_remaining_mb': daily_remaining / (1024 * 1024),
+        'remaining_uploads_today': quota['remaining_uploads'],
+        'remaining_reviews_today': quota['remaining_reviews'],
+        'xp_threshold_reached': user.xp_points >= 1500
+    }
+
+def invalidate_user_stats(*user_ids):
+    """
+    Mark cached summaries stale. Caller commits, so invalidation is part of the
+    write. Users without a row get an empty one, which also stops a summary
+    being computed right now from being stored.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    now = datetime.utcnow()
+    marked = db.session.execute(
+        update(UserStatsCache).where(UserStatsCache.user_id.in_(user_ids))
+        .values(summary={}, updated_at=now).execution_options(synchronize_session=False)
+    ).rowcount
+    if marked == len(user_ids):
+        return
+
+    existing = set(db.session.execute(
+        select(UserStatsCache.user_id).where(UserStatsCache.user_id.in_(user_ids))
+    ).scalars())
+    for user_id in user_ids - existing:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(UserStatsCache).values(user_id=user_id, summary={}, updated_at=now))
+        except IntegrityError:
+            # A reader stored a summary meanwhile
+            db.session.execute(update(UserStatsCache).where(UserStatsCache.user_id == user_id)
+                               .values(summary={}, updated_at=now))
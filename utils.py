@@ -1,4 +1,3 @@
-import os
 from werkzeug.utils import secure_filename
 from datetime import timedelta
 
@@ -14,6 +13,60 @@ ALLOWED_EXTENSIONS = {
     'text': ['txt', 'md', 'rst', 'log', 'readme', 'license', 'changelog']
 }
 
+# Leading bytes expected for common binary formats: (offset, signature) options per extension
+MAGIC_SIGNATURES = {
+    'pdf': [(0, b'%PDF')],
+    'png': [(0, b'\x89PNG\r\n\x1a\n')],
+    'jpg': [(0, b'\xff\xd8\xff')],
+    'jpeg': [(0, b'\xff\xd8\xff')],
+    'gif': [(0, b'GIF87a'), (0, b'GIF89a')],
+    'bmp': [(0, b'BM')],
+    'webp': [(0, b'RIFF')],
+    'tiff': [(0, b'II*\x00'), (0, b'MM\x00*')],
+    'tif': [(0, b'II*\x00'), (0, b'MM\x00*')],
+    'mp4': [(4, b'ftyp')],
+    'mov': [(4, b'ftyp'), (4, b'moov'), (4, b'mdat'), (4, b'wide')],
+    'm4a': [(4, b'ftyp')],
+    '3gp': [(4, b'ftyp')],
+    'mkv': [(0, b'\x1a\x45\xdf\xa3')],
+    'webm': [(0, b'\x1a\x45\xdf\xa3')],
+    'avi': [(0, b'RIFF')],
+    'wav': [(0, b'RIFF')],
+    'mp3': [(0, b'ID3'), (0, b'\xff\xfb'), (0, b'\xff\xf3'), (0, b'\xff\xf2')],
+    'flac': [(0, b'fLaC')],
+    'ogg': [(0, b'OggS')],
+    'ogv': [(0, b'OggS')],
+    'opus': [(0, b'OggS')],
+    'zip': [(0, b'PK\x03\x04'), (0, b'PK\x05\x06')],
+    'docx': [(0, b'PK\x03\x04')],
+    'xlsx': [(0, b'PK\x03\x04')],
+    'pptx': [(0, b'PK\x03\x04')],
+    'odt': [(0, b'PK\x03\x04')],
+    'epub': [(0, b'PK\x03\x04')],
+    'gz': [(0, b'\x1f\x8b')],
+    'bz2': [(0, b'BZh')],
+    'xz': [(0, b'\xfd7zXZ\x00')],
+    '7z': [(0, b"7z\xbc\xaf'\x1c")],
+    'rar': [(0, b'Rar!\x1a\x07')],
+}
+
+# Extensions that must be plain text
+TEXT_EXTENSIONS = set(ALLOWED_EXTENSIONS['code'] + ALLOWED_EXTENSIONS['text'] + ['csv', 'svg'])
+
+def matches_magic_bytes(filename, head):
+    """Check the first bytes of a file against what its extension promises."""
+    extension = filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+    
+    if extension in MAGIC_SIGNATURES:
+        return any(head[offset:offset + len(signature)] == signature
+                   for offset, signature in MAGIC_SIGNATURES[extension])
+    
+    if extension in TEXT_EXTENSIONS:
+        return b'\x00' not in head
+    
+    # No known signature - extension check alone decides
+    return True
+
 def allowed_file(filename):
     """Check if file extension is allowed."""
     if not filename:
@@ -27,13 +80,6 @@ def allowed_file(filename):
     
     return False
 
-def get_file_size(file):
-    """Get file size in bytes."""
-    file.seek(0, os.SEEK_END)
-    size = file.tell()
-    file.seek(0)  # Reset file pointer
-    return size
-
 def calculate_xp_reward(action_type):
     """Calculate XP reward for different platform actions."""
     rewards = {
@@ -97,11 +143,19 @@ def validate_content_description(description):
         return False, "Description must be at least 10 characters long."
     
     # Check for spam patterns
-    spam_indicators = ['free money', 'click here', 'guaranteed', 'act now']
-    description_lower = description.lower()
-    
-    for indicator in spam_indicators:
-        if indicator in description_lower:
-            return False, f"Description contains potentially spammy content: '{indicator}'"
+    found = get_spam_indicators(description)
+    if found:
+        return False, f"Description contains potentially spammy content: '{found[0]}'"
     
     return True, "Description is valid."
+
+SPAM_INDICATORS = ['free money', 'click here', 'guaranteed', 'act now']
+
+def get_spam_indicators(description):
+    """Return the known spam phrases found in a description."""
+    description_lower = (description or '').lower()
+    return [indicator for indicator in SPAM_INDICATORS if indicator in description_lower]
+
+def get_local_spam_score(description):
+    """Spam score 0.0-1.0 from known spam phrases, used when the AI check is skipped."""
+    return 1.0 if get_spam_indicators(description) else 0.0
@@ -0,0 +1,14 @@
+# Alpha Nex - Background Worker Entry Point
+# Drains the analysis job queue: python worker.py
+from app import create_app
+from job_queue import run_worker
+from retention import schedule_retention
+import tasks  # noqa: F401 - registers job handlers
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        app.logger.setLevel('INFO')
+        app.logger.info("Alpha Nex worker started")
+        schedule_retention()
+        run_worker()